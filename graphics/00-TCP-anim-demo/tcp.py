@@ -1,18 +1,35 @@
 import math
+import os
 import random
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.animation import FuncAnimation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy.spatial import cKDTree
 
 # Set random seed for reproducibility
 np.random.seed(42)
 
 
-def generate_cities(num_cities, width=1000, height=1000):
-    """Generate random city coordinates"""
-    cities = np.random.randint(0, [width, height], size=(num_cities, 2))
-    return cities
+def generate_cities(num_cities, width=1000, height=1000, n_clusters=None, spread=0.03):
+    """
+    Generate random city coordinates, uniform over the box or, with
+    n_clusters, scattered normally (spread x box size) around random centers
+    """
+    if n_clusters is None:
+        cities = np.random.randint(0, [width, height], size=(num_cities, 2))
+        return cities
+    centers = np.random.uniform(0, [width, height], size=(n_clusters, 2))
+    labels = np.random.randint(n_clusters, size=num_cities)
+    offsets = np.random.normal(0, spread * np.array([width, height]), (num_cities, 2))
+    cities = np.clip(centers[labels] + offsets, 0, [width - 1, height - 1])
+    return cities.astype(int)
 
 
 def calculate_distance(city1, city2):
@@ -30,80 +47,1045 @@ def calculate_route_length(route, cities):
     return total_distance
 
 
+def nearest_neighbors(cities, n_neighbors):
+    """Indices of the n_neighbors closest cities to each city, nearest first"""
+    num_cities = len(cities)
+    n_neighbors = min(n_neighbors, num_cities - 1)
+    _, idx = cKDTree(cities).query(cities, k=n_neighbors + 1)
+    # Drop each city from its own list; with duplicate coordinates it is
+    # not necessarily the first hit, and may be missing (then drop the last)
+    keep = idx != np.arange(num_cities)[:, None]
+    keep[keep.all(axis=1), -1] = False
+    return idx[keep].reshape(num_cities, n_neighbors).astype(np.int32)
+
+
+class DistanceMatrix:
+    """
+    Dense float32 distance matrix for small instances.
+
+    Calling the backend with two city indices returns their distance as a
+    Python float; `pairs` does the same for index arrays. `neighbors` holds
+    the k-nearest-neighbor candidate list of every city.
+    """
+
+    def __init__(self, cities, n_neighbors=10, block_size=1024):
+        xy = np.asarray(cities, dtype=np.float64)
+        num_cities = len(xy)
+        self.matrix = np.empty((num_cities, num_cities), dtype=np.float32)
+        # Fill in row blocks so the float64 temporaries stay small
+        for start in range(0, num_cities, block_size):
+            stop = min(start + block_size, num_cities)
+            diff = xy[start:stop, None, :] - xy[None, :, :]
+            self.matrix[start:stop] = np.hypot(diff[..., 0], diff[..., 1])
+        self.neighbors = nearest_neighbors(xy, n_neighbors)
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def __call__(self, a, b):
+        return self.matrix.item(a, b)
+
+    def pairs(self, a, b):
+        return self.matrix[a, b].astype(np.float64)
+
+
+class NeighborDistances:
+    """
+    Neighbor-list backend for large instances.
+
+    Memory is O(cities x n_neighbors): only the KD-tree candidate lists are
+    stored and every distance is evaluated lazily from the coordinates.
+    """
+
+    def __init__(self, cities, n_neighbors=10):
+        xy = np.asarray(cities, dtype=np.float64)
+        self.xy = xy
+        # Plain lists make scalar lookups much cheaper than NumPy indexing
+        self._x = xy[:, 0].tolist()
+        self._y = xy[:, 1].tolist()
+        self.neighbors = nearest_neighbors(xy, n_neighbors)
+
+    def __len__(self):
+        return len(self.xy)
+
+    def __call__(self, a, b):
+        return math.hypot(self._x[a] - self._x[b], self._y[a] - self._y[b])
+
+    def pairs(self, a, b):
+        diff = self.xy[a] - self.xy[b]
+        return np.hypot(diff[..., 0], diff[..., 1])
+
+
+def distance_backend(cities, dense_limit=5000, n_neighbors=10):
+    """
+    Pick a distance backend for the instance size: a dense matrix up to
+    dense_limit cities (100 MB at 5000), lazy neighbor lists beyond that.
+    """
+    if len(cities) <= dense_limit:
+        return DistanceMatrix(cities, n_neighbors=n_neighbors)
+    return NeighborDistances(cities, n_neighbors=n_neighbors)
+
+
+def route_length(route, distances):
+    """Total length of a closed route, vectorized over a distance backend"""
+    route = np.asarray(route)
+    return float(distances.pairs(route, np.roll(route, -1)).sum())
+
+
+def two_opt_delta(route, distances, i, j):
+    """
+    Change in tour length from reversing route[i : j + 1] (i <= j).
+
+    Only the two edges entering and leaving the segment change, so the
+    delta is computed from four distances regardless of the tour size.
+    """
+    num_cities = len(route)
+    if i == 0 and j == num_cities - 1:
+        return 0.0  # Reversing the whole tour gives the same cycle
+    a, b = route[i - 1], route[i]
+    c, d = route[j], route[(j + 1) % num_cities]
+    return distances(a, c) + distances(b, d) - distances(a, b) - distances(c, d)
+
+
+def reverse_segment(route, i, j, positions=None):
+    """
+    Reverse route[i : j + 1] in place (2-opt move).
+
+    When the segment covers more than half the tour the complementary
+    segment is reversed instead, which gives the same cycle for less work.
+    If given, the positions array (city -> index in route) is kept in sync.
+    """
+    num_cities = len(route)
+    if 2 * (j - i + 1) > num_cities:
+        idx = np.arange(j + 1, i + num_cities) % num_cities
+        route[idx] = route[idx[::-1]]
+    else:
+        idx = np.arange(i, j + 1)
+        route[i : j + 1] = route[i : j + 1][::-1]
+    if positions is not None:
+        positions[route[idx]] = idx
+
+
+def propose_neighbor_move(route, positions, neighbors, rng=random):
+    """
+    Draw a 2-opt segment (i, j) that connects a random city to one of its
+    nearest neighbors, so proposals never waste time on long-edge swaps.
+    """
+    num_cities = len(route)
+    b_pos = rng.randrange(num_cities)
+    b_neighbors = neighbors[route[b_pos]]
+    c_pos = positions[b_neighbors[rng.randrange(len(b_neighbors))]]
+    if c_pos > b_pos:
+        return b_pos + 1, c_pos
+    return c_pos + 1, b_pos
+
+
+def segment_exchange_delta(
+    route, distances, i, j, k, reverse_b=False, reverse_c=False
+):
+    """
+    Change in tour length from rearranging A B C into A C B, where
+    B = route[i + 1 : j + 1] and C = route[j + 1 : k + 1] (0 <= i < j < k)
+    and either segment may be reversed on the way. This covers Or-opt
+    (one short segment) and the pure 3-opt reconnection; only the three
+    removed and three added edges are scored.
+    """
+    num_cities = len(route)
+    a, a_next = route[i], route[i + 1]
+    b_last, c_first = route[j], route[j + 1]
+    c_last, d = route[k], route[(k + 1) % num_cities]
+
+    b_head, b_tail = (b_last, a_next) if reverse_b else (a_next, b_last)
+    c_head, c_tail = (c_last, c_first) if reverse_c else (c_first, c_last)
+    return (
+        distances(a, c_head)
+        + distances(c_tail, b_head)
+        + distances(b_tail, d)
+        - distances(a, a_next)
+        - distances(b_last, c_first)
+        - distances(c_last, d)
+    )
+
+
+def _reverse_range(route, positions, i, j):
+    """Reverse route[i : j + 1] in place without wrapping around the tour"""
+    route[i : j + 1] = route[i : j + 1][::-1]
+    positions[route[i : j + 1]] = np.arange(i, j + 1)
+
+
+def exchange_segments(route, positions, i, j, k, reverse_b=False, reverse_c=False):
+    """Apply the move scored by `segment_exchange_delta` in place"""
+    c_length = k - j
+    _reverse_range(route, positions, i + 1, k)  # A B C -> A C' B'
+    if not reverse_c:
+        _reverse_range(route, positions, i + 1, i + c_length)
+    if not reverse_b:
+        _reverse_range(route, positions, i + c_length + 1, k)
+
+
+def propose_or_opt_move(route, positions, neighbors, rng=random, max_length=3):
+    """
+    Draw an Or-opt move: relocate a segment of 1..max_length cities to sit
+    next to a nearest neighbor of its first city, possibly reversed.
+    Returns `segment_exchange_delta` arguments, or None for a no-op draw.
+    """
+    num_cities = len(route)
+    if num_cities < 5:
+        return None
+    length = rng.randint(1, max_length)
+    start = rng.randrange(1, num_cities - length + 1)
+    end = start + length - 1
+    start_neighbors = neighbors[route[start]]
+    target = positions[start_neighbors[rng.randrange(len(start_neighbors))]]
+    reverse = rng.random() < 0.5
+    if target > end:
+        # Segment is B, moved to just after the target city
+        return start - 1, end, target, reverse, False
+    if target < start - 1:
+        # Segment is C, moved to just after the target city
+        return target, start - 1, end, False, reverse
+    return None
+
+
+def propose_three_opt_move(route, positions, neighbors, rng=random, max_segment=50):
+    """
+    Draw a pure 3-opt segment exchange that links a random city to one of its
+    nearest neighbors, swapping the following two segments (the second at
+    most max_segment cities long). Returns `segment_exchange_delta`
+    arguments, or None for an invalid draw.
+    """
+    num_cities = len(route)
+    if num_cities < 5:
+        return None
+    i = rng.randrange(num_cities - 2)
+    a_neighbors = neighbors[route[i]]
+    j = positions[a_neighbors[rng.randrange(len(a_neighbors))]] - 1
+    if j <= i:
+        return None
+    k = j + rng.randint(1, max_segment)
+    if k > num_cities - 1:
+        return None
+    return i, j, k, False, False
+
+
+OPERATORS = ("2-opt", "or-opt", "3-opt")
+# Draws of an Or-opt or 3-opt move before a step with no valid proposal is skipped
+PROPOSAL_ATTEMPTS = 8
+
+
+class AdaptiveOperators:
+    """
+    Roulette-wheel choice between move operators that adapts to how they
+    perform.
+
+    Every `period` proposals, each operator gets the score
+    acceptance rate + improvement_weight x improvement rate over that
+    period, which is blended into its weight with factor `reaction`.
+    Selection probabilities never drop below min_probability, so an
+    operator that stalls early can come back later in the run.
+    """
+
+    def __init__(
+        self,
+        names=OPERATORS,
+        period=1000,
+        reaction=0.3,
+        improvement_weight=5.0,
+        min_probability=0.05,
+    ):
+        unknown = set(names) - set(OPERATORS)
+        if unknown:
+            raise ValueError(f"Unknown move operators: {sorted(unknown)}")
+        self.names = tuple(names)
+        self.period = period
+        self.reaction = reaction
+        self.improvement_weight = improvement_weight
+        self.min_probability = min_probability
+        self.weights = np.ones(len(self.names))
+        self.used = np.zeros(len(self.names))
+        self.accepted = np.zeros(len(self.names))
+        self.improved = np.zeros(len(self.names))
+        self._since_update = 0
+        self._update_probabilities()
+
+    def _update_probabilities(self):
+        p = self.weights / self.weights.sum()
+        p = np.maximum(p, self.min_probability)
+        self.probabilities = p / p.sum()
+        self._cumulative = np.cumsum(self.probabilities).tolist()
+
+    def choose(self, rng=random):
+        """Index of the operator to use for the next proposal"""
+        r = rng.random()
+        for index, edge in enumerate(self._cumulative):
+            if r < edge:
+                return index
+        return len(self._cumulative) - 1
+
+    def update(self, index, accepted, improved):
+        """Record the outcome of a proposal and adapt the weights every period"""
+        self.used[index] += 1
+        self.accepted[index] += accepted
+        self.improved[index] += improved
+        self._since_update += 1
+        if self._since_update < self.period:
+            return
+
+        used = np.maximum(self.used, 1)
+        score = (self.accepted + self.improvement_weight * self.improved) / used
+        tried = self.used > 0
+        self.weights[tried] = (1 - self.reaction) * self.weights[
+            tried
+        ] + self.reaction * score[tried]
+        self.weights = np.maximum(self.weights, 1e-12)
+        self.used[:] = self.accepted[:] = self.improved[:] = 0
+        self._since_update = 0
+        self._update_probabilities()
+
+    def state_arrays(self):
+        """Settings and adaptive state as arrays, for checkpoints"""
+        return {
+            "operator_names": np.array(self.names),
+            "operator_settings": np.array(
+                [
+                    self.period,
+                    self.reaction,
+                    self.improvement_weight,
+                    self.min_probability,
+                ]
+            ),
+            "operator_weights": self.weights,
+            "operator_counts": np.stack([self.used, self.accepted, self.improved]),
+            "operator_since_update": self._since_update,
+        }
+
+    @classmethod
+    def from_state_arrays(cls, data):
+        """Rebuild a selector saved with `state_arrays`"""
+        period, reaction, improvement_weight, min_probability = data[
+            "operator_settings"
+        ]
+        operators = cls(
+            [str(name) for name in data["operator_names"]],
+            period=int(period),
+            reaction=float(reaction),
+            improvement_weight=float(improvement_weight),
+            min_probability=float(min_probability),
+        )
+        operators.weights = np.array(data["operator_weights"], dtype=float)
+        operators.used, operators.accepted, operators.improved = np.array(
+            data["operator_counts"], dtype=float
+        )
+        operators._since_update = int(data["operator_since_update"])
+        operators._update_probabilities()
+        return operators
+
+
+# Default number of frames kept by RouteHistory
+HISTORY_CAPACITY = 1000
+
+
+class RouteHistory:
+    """
+    Bounded recorder of annealing frames for animation.
+
+    Routes are stored in a preallocated int32 array of `capacity` frames
+    used as a ring buffer, so once it is full the oldest frames are
+    overwritten and memory stays fixed. With `path`, the buffer is a
+    memory-mapped .npy file instead of RAM. Offered frames are decimated:
+    only every `every`-th one is kept, and with `only_improving` only frames
+    that beat the best distance recorded so far.
+
+    Indexing returns routes in chronological order as views into the
+    buffer, so frames are read lazily.
+    """
+
+    def __init__(
+        self,
+        num_cities,
+        capacity=HISTORY_CAPACITY,
+        every=1,
+        only_improving=False,
+        path=None,
+    ):
+        if path is None:
+            self.routes = np.empty((capacity, num_cities), dtype=np.int32)
+        else:
+            self.routes = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.int32, shape=(capacity, num_cities)
+            )
+        self._distances = np.empty(capacity)
+        self._temps = np.empty(capacity)
+        self._iterations = np.empty(capacity, dtype=np.int64)
+        self.capacity = capacity
+        self.every = every
+        self.only_improving = only_improving
+        self._offered = 0
+        self._recorded = 0
+        self._best_distance = math.inf
+
+    def record(self, route, distance, temp, iteration):
+        """Offer a frame; returns True if it was kept"""
+        self._offered += 1
+        if (self._offered - 1) % self.every:
+            return False
+        if self.only_improving and distance >= self._best_distance:
+            return False
+        self._best_distance = min(self._best_distance, distance)
+
+        slot = self._recorded % self.capacity
+        self.routes[slot] = route
+        self._distances[slot] = distance
+        self._temps[slot] = temp
+        self._iterations[slot] = iteration
+        self._recorded += 1
+        return True
+
+    def __len__(self):
+        return min(self._recorded, self.capacity)
+
+    def _slots(self):
+        """Buffer slots in chronological order"""
+        first = max(0, self._recorded - self.capacity)
+        return (first + np.arange(len(self))) % self.capacity
+
+    def __getitem__(self, frame):
+        if not -len(self) <= frame < len(self):
+            raise IndexError(f"frame {frame} out of range for {len(self)} frames")
+        first = max(0, self._recorded - self.capacity)
+        return self.routes[(first + frame % len(self)) % self.capacity]
+
+    @property
+    def distances(self):
+        return self._distances[self._slots()]
+
+    @property
+    def temps(self):
+        return self._temps[self._slots()]
+
+    @property
+    def iterations(self):
+        return self._iterations[self._slots()]
+
+
+class AnnealState:
+    """Current route, best route and temperature of one annealing chain"""
+
+    def __init__(self, route, distances, temp, iteration=1):
+        self.route = np.array(route)
+        self.positions = np.empty_like(self.route)
+        self.positions[self.route] = np.arange(len(self.route))
+        self.current_distance = route_length(self.route, distances)
+        self.best_distance = self.current_distance
+        # The best route is only copied when the chain moves away from it
+        self.current_is_best = True
+        self._best_route = None
+        self.temp = temp
+        self.iteration = iteration
+
+    @property
+    def best_route(self):
+        if self.current_is_best:
+            return self.route.copy()
+        return self._best_route.copy()
+
+
+def anneal_steps(
+    state,
+    distances,
+    n_steps,
+    cooling_rate=1.0,
+    stopping_temp=0.0,
+    neighbor_moves=True,
+    rng=random,
+    operators=None,
+):
+    """
+    Advance an AnnealState by up to n_steps Metropolis moves.
+
+    The temperature is multiplied by cooling_rate after every step and the
+    loop stops early once it falls below stopping_temp. rng is any object
+    with the `random` module interface (e.g. a `random.Random` instance).
+
+    Without operators every move is a 2-opt reversal. With an
+    `AdaptiveOperators`, each step first picks 2-opt, Or-opt or 3-opt from
+    it and reports the outcome back; all three are scored in O(1). Or-opt
+    and 3-opt draws that yield no move are redrawn up to PROPOSAL_ATTEMPTS
+    times; if none is valid the step only cools and is not reported.
+    """
+    route, positions = state.route, state.positions
+    num_cities = len(route)
+    neighbors = distances.neighbors
+    names = OPERATORS[:1] if operators is None else operators.names
+    temp = state.temp
+    current_distance = state.current_distance
+    best_distance = state.best_distance
+    current_is_best = state.current_is_best
+
+    steps = 0
+    while steps < n_steps and temp > stopping_temp:
+        op = 0 if operators is None else operators.choose(rng)
+        move = None
+        if names[op] == "2-opt":
+            # Pick a segment to reverse (2-opt move)
+            if neighbor_moves:
+                i, j = propose_neighbor_move(route, positions, neighbors, rng)
+            else:
+                i, j = sorted(rng.sample(range(num_cities), 2))
+
+            # Score the move from the four edges it changes
+            delta = two_opt_delta(route, distances, i, j)
+        else:
+            propose = (
+                propose_or_opt_move
+                if names[op] == "or-opt"
+                else propose_three_opt_move
+            )
+            # Redraw no-op proposals a few times before giving up on the step
+            for _ in range(PROPOSAL_ATTEMPTS):
+                move = propose(route, positions, neighbors, rng)
+                if move is not None:
+                    break
+            if move is None:
+                # Nothing was proposed: no Metropolis test, no operator credit
+                temp *= cooling_rate
+                steps += 1
+                continue
+            # Score the move from the six edges it changes
+            delta = segment_exchange_delta(route, distances, *move)
+
+        # Decide whether to accept the new solution
+        accepted = delta <= 0 or math.exp(-delta / temp) > rng.random()
+        if accepted:
+            if current_is_best and delta > 0:
+                state._best_route = route.copy()
+                current_is_best = False
+
+            if move is not None:
+                exchange_segments(route, positions, *move)
+            elif names[op] == "2-opt":
+                reverse_segment(route, i, j, positions)  # pyright: ignore
+            current_distance += delta
+
+            # Update the best route if we found a better one
+            if current_distance < best_distance:
+                best_distance = current_distance
+                current_is_best = True
+
+        if operators is not None:
+            operators.update(op, accepted, delta < 0)
+
+        # Cooling schedule
+        temp *= cooling_rate
+        steps += 1
+
+    state.temp = temp
+    state.current_distance = current_distance
+    state.best_distance = best_distance
+    state.current_is_best = current_is_best
+    state.iteration += steps
+    return steps
+
+
+def save_checkpoint(path, state, params, operators=None):
+    """
+    Write an annealing checkpoint to a compact .npz file: the current and
+    best routes (int32), distances, temperature, iteration, the state of the
+    `random` module, the run parameters and, if used, the adaptive operator
+    state. The file is replaced atomically so a preempted write never leaves
+    a truncated checkpoint behind.
+    """
+    if operators is not None:
+        params = {**params, **operators.state_arrays()}
+    version, internal_state, gauss_next = random.getstate()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            route=state.route.astype(np.int32),
+            best_route=state.best_route.astype(np.int32),
+            current_distance=state.current_distance,
+            best_distance=state.best_distance,
+            current_is_best=state.current_is_best,
+            temp=state.temp,
+            iteration=state.iteration,
+            rng_version=version,
+            rng_state=np.array(internal_state, dtype=np.uint32),
+            rng_gauss_next=np.nan if gauss_next is None else gauss_next,
+            **params,
+        )
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, distances):
+    """Read a checkpoint written by `save_checkpoint`; returns (state, params)"""
+    with np.load(path) as data:
+        state = AnnealState(data["route"].astype(np.intp), distances, 0.0)
+        state.current_distance = float(data["current_distance"])
+        state.best_distance = float(data["best_distance"])
+        state.current_is_best = bool(data["current_is_best"])
+        if not state.current_is_best:
+            state._best_route = data["best_route"].astype(np.intp)
+        state.temp = float(data["temp"])
+        state.iteration = int(data["iteration"])
+
+        gauss_next = float(data["rng_gauss_next"])
+        random.setstate(
+            (
+                int(data["rng_version"]),
+                tuple(int(v) for v in data["rng_state"]),
+                None if math.isnan(gauss_next) else gauss_next,
+            )
+        )
+        params = {
+            "cooling_rate": float(data["cooling_rate"]),
+            "stopping_temp": float(data["stopping_temp"]),
+            "stopping_iter": int(data["stopping_iter"]),
+            "neighbor_moves": bool(data["neighbor_moves"]),
+            "operators": None,
+        }
+        if "operator_names" in data:
+            params["operators"] = AdaptiveOperators.from_state_arrays(data)
+    return state, params
+
+
+def _run_annealing(
+    state,
+    distances,
+    cooling_rate,
+    stopping_temp,
+    stopping_iter,
+    neighbor_moves,
+    operators,
+    history,
+    time_budget,
+    checkpoint_path,
+    checkpoint_every,
+    callback,
+):
+    """Annealing loop shared by `simulated_annealing` and `resume_annealing`"""
+    # Store routes and distances for animation
+    record_every = 100
+    if history is None:
+        # Fixed frame budget: longer runs keep every `every`-th snapshot
+        n_frames = (stopping_iter - state.iteration) // record_every + 2
+        every = max(1, -(-n_frames // HISTORY_CAPACITY))
+        history = RouteHistory(len(state.route), every=every)
+    history.record(state.route, state.current_distance, state.temp, state.iteration)
+
+    params = dict(
+        cooling_rate=cooling_rate,
+        stopping_temp=stopping_temp,
+        stopping_iter=stopping_iter,
+        neighbor_moves=neighbor_moves,
+    )
+    start_time = time.perf_counter()
+    last_checkpoint = start_time
+
+    # Simulated annealing loop, run in blocks between history snapshots
+    while state.temp > stopping_temp and state.iteration < stopping_iter:
+        n_steps = min(
+            record_every - state.iteration % record_every,
+            stopping_iter - state.iteration,
+        )
+        anneal_steps(
+            state,
+            distances,
+            n_steps,
+            cooling_rate=cooling_rate,
+            stopping_temp=stopping_temp,
+            neighbor_moves=neighbor_moves,
+            operators=operators,
+        )
+
+        # Save route history occasionally to reduce memory usage
+        if state.iteration % record_every == 0 or state.temp < stopping_temp:
+            history.record(
+                state.route, state.current_distance, state.temp, state.iteration
+            )
+        if callback is not None:
+            callback(state)
+
+        now = time.perf_counter()
+        if checkpoint_path is not None and now - last_checkpoint >= checkpoint_every:
+            save_checkpoint(checkpoint_path, state, params, operators)
+            last_checkpoint = now
+        if time_budget is not None and now - start_time >= time_budget:
+            break
+
+    # Final checkpoint, so a budget-limited run can be resumed where it stopped
+    if checkpoint_path is not None:
+        save_checkpoint(checkpoint_path, state, params, operators)
+
+    best_route = state.best_route
+    # Drop the floating-point drift accumulated from summing deltas
+    best_distance = route_length(best_route, distances)
+
+    return best_route, best_distance, history, history.distances, history.temps
+
+
 def simulated_annealing(
     cities,
     initial_temp=1000,
     cooling_rate=0.995,
     stopping_temp=1e-8,
     stopping_iter=100000,
+    distances=None,
+    neighbor_moves=True,
+    operators=None,
+    history=None,
+    time_budget=None,
+    checkpoint_path=None,
+    checkpoint_every=60.0,
+    callback=None,
 ):
-    """Solve TSP using simulated annealing"""
+    """
+    Solve TSP using simulated annealing.
+
+    Moves are scored incrementally with `two_opt_delta` and accepted moves
+    are applied to the current route in place, so the cost of a run grows
+    with the number of iterations rather than iterations x cities.
+
+    distances is a backend from `distance_backend` (built from cities when
+    omitted). With neighbor_moves, 2-opt proposals are restricted to the
+    backend's nearest-neighbor lists instead of uniform random segments.
+
+    operators enables Or-opt and 3-opt moves next to 2-opt: pass operator
+    names (e.g. `OPERATORS`) or an `AdaptiveOperators`, which picks among
+    them according to their recent acceptance and improvement rates.
+
+    Every 100 iterations a frame is offered to history, a `RouteHistory`
+    (by default HISTORY_CAPACITY frames, decimated to cover the whole run
+    in long runs). The recorder and its distances and temperatures are
+    returned in place of the history lists.
+
+    time_budget (seconds of wall-clock time) stops the run early, checked
+    every 100 iterations at most. With checkpoint_path, the chain state is
+    written every checkpoint_every seconds and when the run ends, and
+    `resume_annealing` continues it exactly where it stopped.
+
+    callback, if given, is called with the `AnnealState` after every block
+    of at most 100 iterations (e.g. to trace progress against wall time).
+    """
     num_cities = len(cities)
+    if distances is None:
+        distances = distance_backend(cities)
+
+    if operators is not None and not isinstance(operators, AdaptiveOperators):
+        operators = AdaptiveOperators(operators)
 
     # Initialize with a random route
-    current_route = list(range(num_cities))
-    random.shuffle(current_route)
+    initial_route = list(range(num_cities))
+    random.shuffle(initial_route)
+    state = AnnealState(initial_route, distances, initial_temp)
 
-    current_distance = calculate_route_length(current_route, cities)
-    best_route = current_route.copy()
-    best_distance = current_distance
+    return _run_annealing(
+        state,
+        distances,
+        cooling_rate,
+        stopping_temp,
+        stopping_iter,
+        neighbor_moves,
+        operators,
+        history,
+        time_budget,
+        checkpoint_path,
+        checkpoint_every,
+        callback,
+    )
 
-    # Initialize temperature and iteration counters
-    temp = initial_temp
-    iteration = 1
 
-    # Store routes and distances for animation
-    routes_history = [best_route.copy()]
-    distances_history = [best_distance]
-    temps_history = [temp]
+def resume_annealing(
+    cities,
+    checkpoint_path,
+    distances=None,
+    history=None,
+    time_budget=None,
+    checkpoint_every=60.0,
+    callback=None,
+):
+    """
+    Continue a `simulated_annealing` run from its checkpoint.
 
-    # Simulated annealing loop
-    while temp > stopping_temp and iteration < stopping_iter:
-        # Create a new candidate route by swapping two random cities
-        candidate_route = current_route.copy()
-        i, j = sorted(random.sample(range(num_cities), 2))
+    The route, best route, temperature, iteration count, `random` module
+    state, adaptive operator state and run parameters are restored, so the
+    resumed chain follows exactly the trajectory the uninterrupted run
+    would have. New checkpoints keep going to checkpoint_path. Returns the
+    same tuple as `simulated_annealing`; history only covers the resumed
+    part.
+    """
+    if distances is None:
+        distances = distance_backend(cities)
+    state, params = load_checkpoint(checkpoint_path, distances)
 
-        # Swap segment between i and j (2-opt move)
-        candidate_route[i : j + 1] = reversed(candidate_route[i : j + 1])
+    return _run_annealing(
+        state,
+        distances,
+        params["cooling_rate"],
+        params["stopping_temp"],
+        params["stopping_iter"],
+        params["neighbor_moves"],
+        params["operators"],
+        history,
+        time_budget,
+        checkpoint_path,
+        checkpoint_every,
+        callback,
+    )
 
-        # Calculate new route distance
-        candidate_distance = calculate_route_length(candidate_route, cities)
 
-        # Decide whether to accept the new solution
-        delta = candidate_distance - current_distance
-        acceptance_probability = math.exp(-delta / temp) if delta > 0 else 1.0
+##############################################################################
+# Batched annealing (vectorized move evaluation)
+##############################################################################
+def propose_neighbor_moves(route, positions, neighbors, batch_size, rng):
+    """Vectorized `propose_neighbor_move`: arrays of segment bounds (i, j)"""
+    num_cities = len(route)
+    b_pos = rng.integers(num_cities, size=batch_size)
+    c = neighbors[route[b_pos], rng.integers(neighbors.shape[1], size=batch_size)]
+    c_pos = positions[c]
+    forward = c_pos > b_pos
+    i = np.where(forward, b_pos + 1, c_pos + 1)
+    j = np.where(forward, c_pos, b_pos)
+    keep = i < j
+    return i[keep], j[keep]
 
-        if acceptance_probability > random.random():
-            current_route = candidate_route
-            current_distance = candidate_distance
 
-            # Update the best route if we found a better one
-            if current_distance < best_distance:
-                best_route = current_route.copy()
-                best_distance = current_distance
+def two_opt_deltas(route, distances, i, j):
+    """Vectorized `two_opt_delta` for arrays of segments with 1 <= i < j"""
+    a, b = route[i - 1], route[i]
+    c, d = route[j], route[(j + 1) % len(route)]
+    return (
+        distances.pairs(a, c)
+        + distances.pairs(b, d)
+        - distances.pairs(a, b)
+        - distances.pairs(c, d)
+    )
+
+
+def select_non_conflicting(i, j):
+    """
+    Mask of segments that can be applied together: earliest-end-first
+    interval scheduling, keeping a segment only if it starts at least two
+    positions after the last kept one ends. No two kept moves then share an
+    edge, so their deltas add, and the largest possible set is kept.
+    """
+    order = np.argsort(j, kind="stable")
+    keep = np.zeros(len(i), dtype=bool)
+    reach = -2
+    # Plain-Python pass over the (already accepted) candidates only
+    for k, start, end in zip(order.tolist(), i[order].tolist(), j[order].tolist()):
+        if start >= reach + 2:
+            keep[k] = True
+            reach = end
+    return keep
+
+
+def reverse_segments(route, positions, i, j):
+    """Reverse many disjoint segments route[i : j + 1] at once"""
+    lengths = j - i + 1
+    starts = np.repeat(i, lengths)
+    ends = np.repeat(j, lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    idx = starts + offsets
+    route[idx] = route[ends - offsets]
+    positions[route[idx]] = idx
+
+
+def batched_annealing(
+    cities,
+    initial_temp=1000,
+    cooling_rate=0.99,
+    stopping_temp=1e-8,
+    n_sweeps=2000,
+    batch_size=4096,
+    distances=None,
+    seed=None,
+    record_every=10,
+    history=None,
+):
+    """
+    Solve TSP with batches of vectorized 2-opt moves.
+
+    Each sweep draws batch_size neighbor-list moves as NumPy arrays, scores
+    all of their deltas at once against the distance backend, applies the
+    Metropolis test to the whole batch and commits a non-conflicting subset
+    of the accepted moves. The temperature is multiplied by cooling_rate
+    once per sweep.
+
+    Returns the same tuple as `simulated_annealing`, with a frame offered to
+    history (a `RouteHistory`) every record_every sweeps.
+    """
+    rng = np.random.default_rng(seed)
+    num_cities = len(cities)
+    if distances is None:
+        distances = distance_backend(cities)
+
+    route = rng.permutation(num_cities)
+    positions = np.empty_like(route)
+    positions[route] = np.arange(num_cities)
+    current_distance = route_length(route, distances)
+    best_route, best_distance = route.copy(), current_distance
+
+    temp = initial_temp
+    if history is None:
+        n_frames = n_sweeps // record_every + 1
+        every = max(1, -(-n_frames // HISTORY_CAPACITY))
+        history = RouteHistory(num_cities, every=every)
+    history.record(route, current_distance, temp, 0)
+
+    for sweep in range(1, n_sweeps + 1):
+        if temp <= stopping_temp:
+            break
+        i, j = propose_neighbor_moves(
+            route, positions, distances.neighbors, batch_size, rng
+        )
+        delta = two_opt_deltas(route, distances, i, j)
+
+        # Metropolis test for the whole batch
+        accept = rng.random(len(delta)) < np.exp(-np.maximum(delta, 0) / temp)
+        i, j, delta = i[accept], j[accept], delta[accept]
+
+        # Commit the moves that do not touch each other
+        keep = select_non_conflicting(i, j)
+        reverse_segments(route, positions, i[keep], j[keep])
+        current_distance += float(delta[keep].sum())
+
+        if current_distance < best_distance:
+            best_route, best_distance = route.copy(), current_distance
 
-        # Cooling schedule
         temp *= cooling_rate
-        iteration += 1
+        if sweep % record_every == 0:
+            history.record(route, current_distance, temp, sweep)
 
-        # Save route history occasionally to reduce memory usage
-        if iteration % 100 == 0 or temp < stopping_temp:
-            routes_history.append(current_route.copy())
-            distances_history.append(current_distance)
-            temps_history.append(temp)  # pyright: ignore
+    # Drop the floating-point drift accumulated from summing deltas
+    best_distance = route_length(best_route, distances)
 
-    return best_route, best_distance, routes_history, distances_history, temps_history
+    return best_route, best_distance, history, history.distances, history.temps
 
 
-def animate_tsp(
+##############################################################################
+# Parallel tempering (replica exchange)
+##############################################################################
+_worker_distances = None
+
+
+def _init_replica_worker(cities, dense_limit, n_neighbors):
+    """Build the distance backend once per worker process"""
+    global _worker_distances
+    _worker_distances = distance_backend(cities, dense_limit, n_neighbors)
+
+
+def _run_replica(route, temp, n_steps, seed, neighbor_moves):
+    """Run n_steps of fixed-temperature annealing on one replica (worker side)"""
+    state = AnnealState(route, _worker_distances, temp)
+    anneal_steps(
+        state,
+        _worker_distances,
+        n_steps,
+        neighbor_moves=neighbor_moves,
+        rng=random.Random(seed),
+    )
+    return state.route, state.current_distance, state.best_route, state.best_distance
+
+
+def parallel_tempering(
     cities,
-    routes_history,
-    distances_history,
-    temps_history,
-    milliseconds_between_frames,
+    n_replicas=8,
+    min_temp=1.0,
+    max_temp=1000.0,
+    n_rounds=200,
+    steps_per_round=1000,
+    max_workers=None,
+    seed=None,
+    dense_limit=5000,
+    n_neighbors=10,
+    neighbor_moves=True,
 ):
-    """Create an animation of the TSP solution process"""
-    fig = plt.figure(figsize=(15, 8))
+    """
+    Solve TSP with replica exchange across a process pool.
+
+    n_replicas chains run at a geometric ladder of fixed temperatures
+    between min_temp and max_temp, each in its own worker. After every round
+    of steps_per_round moves, neighboring temperatures attempt to swap
+    states with the usual exchange probability
+    min(1, exp((1/T_k - 1/T_k+1) * (E_k - E_k+1))), alternating even and
+    odd pairs between rounds.
+
+    Returns the best route over all replicas, its distance, the best
+    distance after each round, and the swap acceptance rate of each
+    neighboring temperature pair.
+    """
+    if n_replicas < 1 or n_rounds < 1:
+        raise ValueError(
+            f"Need at least one replica and one round, got n_replicas={n_replicas}"
+            f" and n_rounds={n_rounds}"
+        )
+    rng = random.Random(seed)
+    num_cities = len(cities)
+    temps = np.geomspace(min_temp, max_temp, n_replicas).tolist()
+
+    # Every replica starts from its own random route
+    routes = []
+    for _ in range(n_replicas):
+        route = list(range(num_cities))
+        rng.shuffle(route)
+        routes.append(np.array(route))
+    energies = [None] * n_replicas
+
+    best_route, best_distance = None, math.inf
+    distances_history = []
+    swap_attempts = np.zeros(n_replicas - 1)
+    swap_accepts = np.zeros(n_replicas - 1)
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_replica_worker,
+        initargs=(cities, dense_limit, n_neighbors),
+    ) as executor:
+        for round_index in range(n_rounds):
+            seeds = [rng.getrandbits(63) for _ in range(n_replicas)]
+            results = executor.map(
+                _run_replica,
+                routes,
+                temps,
+                [steps_per_round] * n_replicas,
+                seeds,
+                [neighbor_moves] * n_replicas,
+            )
+            for k, (route, energy, replica_best, replica_best_distance) in enumerate(
+                results
+            ):
+                routes[k], energies[k] = route, energy
+                if replica_best_distance < best_distance:
+                    best_route, best_distance = replica_best, replica_best_distance
+            distances_history.append(best_distance)
+
+            # Exchange states between neighboring temperatures
+            for k in range(round_index % 2, n_replicas - 1, 2):
+                swap_attempts[k] += 1
+                log_ratio = (1 / temps[k] - 1 / temps[k + 1]) * (
+                    energies[k] - energies[k + 1]
+                )
+                if log_ratio >= 0 or math.exp(log_ratio) > rng.random():
+                    swap_accepts[k] += 1
+                    routes[k], routes[k + 1] = routes[k + 1], routes[k]
+                    energies[k], energies[k + 1] = energies[k + 1], energies[k]
+
+    # Drop the floating-point drift accumulated from summing deltas
+    distances = distance_backend(cities, dense_limit, n_neighbors)
+    best_distance = route_length(best_route, distances)
+    swap_rates = swap_accepts / np.maximum(swap_attempts, 1)
+    return best_route, best_distance, distances_history, swap_rates
+
+
+def _draw_tsp_figure(fig, cities, distances_history, temps_history, frame_iterations):
+    """
+    Lay out the route / distance / temperature panels on fig.
+
+    Returns the per-frame draw function draw(frame, route), which updates
+    the artists for that frame and returns them, so the same figure code
+    serves the interactive animation and the off-screen export workers.
+    """
     gs = fig.add_gridspec(2, 2)
     ax1 = fig.add_subplot(gs[:, 0])  # Route plot (left, full height)
     ax2 = fig.add_subplot(gs[0, 1])  # Distance plot (top right)
@@ -120,7 +1102,7 @@ def animate_tsp(
     (route_line,) = ax1.plot([], [], "b-", linewidth=1.5, alpha=0.7)
 
     # For distance progress
-    iterations = list(range(len(distances_history)))
+    iterations = np.arange(len(distances_history))
     ax2.plot(iterations, distances_history, "g-", alpha=0.5)
     (progress_line,) = ax2.plot([], [], "go-")
     ax2.set_xlabel("Iteration (scaled)")
@@ -135,9 +1117,12 @@ def animate_tsp(
     ax3.set_title("Cooling Schedule")
     ax3.set_yscale("log")
 
-    # Add city labels
-    for i, (x_pos, y_pos) in enumerate(cities):
-        ax1.annotate(str(i), (x_pos, y_pos), xytext=(5, 5), textcoords="offset points")
+    # Add city labels (unreadable and slow to draw on large instances)
+    if len(cities) <= 100:
+        for i, (x_pos, y_pos) in enumerate(cities):
+            ax1.annotate(
+                str(i), (x_pos, y_pos), xytext=(5, 5), textcoords="offset points"
+            )
 
     # Set fixed axis limits for the route plot
     x_margin = (max(x) - min(x)) * 0.1
@@ -156,20 +1141,10 @@ def animate_tsp(
         bbox=dict(facecolor="white", alpha=0.7),
     )
 
-    # Animation update function
-    def update(frame):
-        route = routes_history[frame]
-
-        # Get ordered coordinates for the route
-        route_x = [cities[route[i], 0] for i in range(len(route))]
-        route_y = [cities[route[i], 1] for i in range(len(route))]
-
-        # Add the first city to close the loop
-        route_x.append(cities[route[0], 0])
-        route_y.append(cities[route[0], 1])
-
-        # Update route line
-        route_line.set_data(route_x, route_y)
+    def draw(frame, route):
+        # Ordered coordinates of the closed route in one fancy-index
+        route_xy = cities[np.append(route, route[0])]
+        route_line.set_data(route_xy[:, 0], route_xy[:, 1])
 
         # Update progress indicators
         progress_line.set_data(iterations[: frame + 1], distances_history[: frame + 1])
@@ -177,11 +1152,48 @@ def animate_tsp(
 
         # Update stats text
         stats_text.set_text(
-            f"Iteration: {frame * 100}\nDistance: {distances_history[frame]:.2f}\nTemperature: {temps_history[frame]:.4f}"
+            f"Iteration: {frame_iterations[frame]}\nDistance: {distances_history[frame]:.2f}\nTemperature: {temps_history[frame]:.4f}"
         )
 
         return route_line, progress_line, temp_line, stats_text
 
+    return draw
+
+
+def _frame_iterations(routes_history):
+    """Iteration number of each frame, for the stats text"""
+    frame_iterations = getattr(routes_history, "iterations", None)
+    if frame_iterations is None:
+        frame_iterations = [frame * 100 for frame in range(len(routes_history))]
+    return frame_iterations
+
+
+def animate_tsp(
+    cities,
+    routes_history,
+    distances_history,
+    temps_history,
+    milliseconds_between_frames,
+):
+    """
+    Create an animation of the TSP solution process.
+
+    routes_history may be a list of routes or a `RouteHistory`; frames are
+    read from it one at a time as the animation runs.
+    """
+    fig = plt.figure(figsize=(15, 8))
+    draw = _draw_tsp_figure(
+        fig,
+        cities,
+        np.asarray(distances_history),
+        np.asarray(temps_history),
+        _frame_iterations(routes_history),
+    )
+
+    # Animation update function
+    def update(frame):
+        return draw(frame, routes_history[frame])
+
     # Create animation
     animation = FuncAnimation(
         fig,
@@ -196,6 +1208,124 @@ def animate_tsp(
     return animation
 
 
+# Figure state of each export worker, built once by _init_tsp_export_worker
+_worker_figure = None
+
+
+def _init_tsp_export_worker(
+    cities, distances_history, temps_history, frame_iterations, dpi
+):
+    """Build the figure once per worker process"""
+    global _worker_figure
+    fig = Figure(figsize=(15, 8), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    draw = _draw_tsp_figure(
+        fig, cities, distances_history, temps_history, frame_iterations
+    )
+    fig.tight_layout()
+    _worker_figure = canvas, draw
+
+
+def _render_tsp_frames(frames, routes):
+    """Render a chunk of frames off-screen (worker side); returns RGB buffers"""
+    canvas, draw = _worker_figure
+    buffers = []
+    for frame, route in zip(frames, routes):
+        draw(frame, route)
+        canvas.draw()
+        rgba = np.asarray(canvas.buffer_rgba())
+        buffers.append(rgba[..., :3].tobytes())
+    width, height = canvas.get_width_height()
+    return width, height, buffers
+
+
+def export_tsp_animation(
+    cities,
+    routes_history,
+    distances_history,
+    temps_history,
+    filename,
+    fps=4,
+    dpi=200,
+    max_workers=None,
+    chunk_size=4,
+    ffmpeg="ffmpeg",
+):
+    """
+    Render the animation frames in a process pool and stream them to ffmpeg.
+
+    Frames are split into chunks of chunk_size, each rendered off-screen by a
+    worker, and the raw RGB buffers are piped to ffmpeg in frame order as the
+    chunks complete. Each worker builds the figure once (see
+    _init_tsp_export_worker) and only redraws the route per frame. At most
+    max_workers + 1 chunks are in flight, so memory stays bounded for long
+    runs. The output format follows the extension of filename (e.g. .gif or
+    .mp4).
+    """
+    distances_history = np.asarray(distances_history)
+    temps_history = np.asarray(temps_history)
+    frame_iterations = np.asarray(_frame_iterations(routes_history))
+    n_frames = len(routes_history)
+    chunks = [
+        range(start, min(start + chunk_size, n_frames))
+        for start in range(0, n_frames, chunk_size)
+    ]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    encoder = None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_tsp_export_worker,
+            initargs=(cities, distances_history, temps_history, frame_iterations, dpi),
+        ) as executor:
+            pending = deque()
+            next_chunk = 0
+            while pending or next_chunk < len(chunks):
+                # Keep the pool busy without buffering the whole animation
+                while next_chunk < len(chunks) and len(pending) <= max_workers:
+                    frames = chunks[next_chunk]
+                    routes = np.stack([routes_history[frame] for frame in frames])
+                    pending.append(
+                        executor.submit(_render_tsp_frames, list(frames), routes)
+                    )
+                    next_chunk += 1
+
+                width, height, buffers = pending.popleft().result()
+                if encoder is None:
+                    encoder = subprocess.Popen(
+                        [
+                            ffmpeg,
+                            "-y",
+                            "-loglevel",
+                            "error",
+                            "-f",
+                            "rawvideo",
+                            "-pix_fmt",
+                            "rgb24",
+                            "-s",
+                            f"{width}x{height}",
+                            "-r",
+                            str(fps),
+                            "-i",
+                            "-",
+                            filename,
+                        ],
+                        stdin=subprocess.PIPE,
+                    )
+                for buffer in buffers:
+                    encoder.stdin.write(buffer)  # pyright: ignore
+    finally:
+        # Let ffmpeg exit even when a worker failed
+        if encoder is not None:
+            encoder.stdin.close()  # pyright: ignore
+            encoder.wait()
+
+    if encoder is not None and encoder.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {filename}")
+    return filename
+
+
 def main():
     # Parameters
     num_cities = 25
@@ -225,8 +1355,16 @@ def main():
         milliseconds_between_frames=300,
     )
 
-    # Save animation as a file (uncomment to save)
-    animation.save("tsp_simulated_annealing.gif", writer="ffmpeg", fps=4, dpi=200)
+    # Save animation as a file, rendering frames in parallel
+    export_tsp_animation(
+        cities,
+        routes_history,
+        distances_history,
+        temps_history,
+        "tsp_simulated_annealing.gif",
+        fps=4,
+        dpi=200,
+    )
 
     # Show the animation
     plt.show()
@@ -0,0 +1,261 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+import tcp
+
+SIZES = (25, 100, 1000, 10000, 100000)
+ENGINES = {"2-opt": None, "adaptive": tcp.OPERATORS}
+
+
+def cooling_rate_for(initial_temp, final_temp, iterations):
+    """Geometric cooling rate that reaches final_temp after the given iterations"""
+    return (final_temp / initial_temp) ** (1 / iterations)
+
+
+def compare_operators(
+    num_cities=1000,
+    n_clusters=20,
+    iterations=200000,
+    seeds=(0, 1, 2),
+    initial_temp=50.0,
+    final_temp=0.05,
+):
+    """
+    Final tour length of plain 2-opt vs adaptive 2-opt / Or-opt / 3-opt
+    annealing at the same iteration count, on clustered instances from
+    `tcp.generate_cities`. Returns one row per (seed, engine).
+    """
+    cooling_rate = cooling_rate_for(initial_temp, final_temp, iterations)
+    rows = []
+    for seed in seeds:
+        np.random.seed(seed)
+        cities = tcp.generate_cities(num_cities, n_clusters=n_clusters)
+        distances = tcp.distance_backend(cities)
+
+        for engine, operators in (("2-opt", None), ("adaptive", tcp.OPERATORS)):
+            random.seed(seed)
+            start = time.perf_counter()
+            _, best_distance, *_ = tcp.simulated_annealing(
+                cities,
+                initial_temp=initial_temp,
+                cooling_rate=cooling_rate,
+                stopping_temp=0.0,
+                stopping_iter=iterations,
+                distances=distances,
+                operators=operators,
+                history=tcp.RouteHistory(num_cities, capacity=1),
+            )
+            rows.append(
+                {
+                    "seed": seed,
+                    "engine": engine,
+                    "best_distance": best_distance,
+                    "seconds": time.perf_counter() - start,
+                }
+            )
+    return rows
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if platform.system() == "Darwin" else peak / 2**10
+
+
+def run_case(
+    num_cities,
+    seed,
+    engine="2-opt",
+    iterations=100000,
+    time_budget=60.0,
+    initial_temp=None,
+    final_temp=None,
+):
+    """
+    One benchmark run of `tcp.simulated_annealing` on a fixed-seed
+    `tcp.generate_cities` instance.
+
+    The temperature range defaults to the instance scale: from the mean
+    nearest-neighbor distance down to a thousandth of it. The best distance
+    is traced against wall time on a log-spaced grid. Peak memory is the
+    growth of the process's peak RSS over the solve, so run each case in a
+    fresh process (as `run_suite` does) for a clean figure.
+    """
+    np.random.seed(seed)
+    random.seed(seed)
+    cities = tcp.generate_cities(num_cities)
+    rss_before = _peak_rss_mb()
+
+    setup_start = time.perf_counter()
+    distances = tcp.distance_backend(cities)
+    setup_seconds = time.perf_counter() - setup_start
+
+    if initial_temp is None:
+        nearest = distances.pairs(np.arange(num_cities), distances.neighbors[:, 0])
+        initial_temp = float(np.mean(nearest))
+    if final_temp is None:
+        final_temp = initial_temp / 1000
+
+    curve = []
+    next_sample = [0.0]
+    start = time.perf_counter()
+
+    def trace(state):
+        elapsed = time.perf_counter() - start
+        if elapsed >= next_sample[0]:
+            curve.append((elapsed, state.iteration, state.best_distance))
+            next_sample[0] = max(1e-3, elapsed * 1.25)
+
+    _, best_distance, history, *_ = tcp.simulated_annealing(
+        cities,
+        initial_temp=initial_temp,
+        cooling_rate=cooling_rate_for(initial_temp, final_temp, iterations),
+        stopping_temp=0.0,
+        stopping_iter=iterations,
+        distances=distances,
+        operators=ENGINES[engine],
+        history=tcp.RouteHistory(num_cities, capacity=1),
+        time_budget=time_budget,
+        callback=trace,
+    )
+    seconds = time.perf_counter() - start
+    iterations_done = int(history.iterations[-1])
+    curve.append((seconds, iterations_done, best_distance))
+
+    return {
+        "num_cities": num_cities,
+        "seed": seed,
+        "engine": engine,
+        "backend": type(distances).__name__,
+        "iterations": iterations_done,
+        "setup_seconds": setup_seconds,
+        "seconds": seconds,
+        "iterations_per_sec": iterations_done / seconds,
+        "peak_memory_mb": _peak_rss_mb() - rss_before,
+        "best_distance": best_distance,
+        "curve": curve,
+    }
+
+
+def run_suite(
+    sizes=SIZES,
+    seeds=(0,),
+    engines=tuple(ENGINES),
+    iterations=100000,
+    time_budget=60.0,
+):
+    """Run every (size, seed, engine) case, each in a fresh process"""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for num_cities in sizes:
+        for seed in seeds:
+            for engine in engines:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(
+                        run_case, num_cities, seed, engine, iterations, time_budget
+                    ).result()
+                print(
+                    f"{num_cities:>7} cities  seed {seed}  {engine:<9}"
+                    f"{result['iterations_per_sec']:>10.0f} it/s"
+                    f"{result['peak_memory_mb']:>9.1f} MB"
+                    f"{result['best_distance']:>14.1f}"
+                )
+                results.append(result)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "iterations": iterations,
+            "time_budget": time_budget,
+        },
+        "results": results,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.1):
+    """
+    Print each case's change against a baseline report and return the
+    regressions: throughput or best distance worse than the baseline by
+    more than the tolerance (a fraction), or peak memory above it.
+    """
+
+    def key(result):
+        return result["num_cities"], result["seed"], result["engine"]
+
+    baseline_results = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        reference = baseline_results.get(key(result))
+        if reference is None:
+            continue
+        speed = result["iterations_per_sec"] / reference["iterations_per_sec"]
+        quality = result["best_distance"] / reference["best_distance"]
+        memory = result["peak_memory_mb"] - reference["peak_memory_mb"]
+        print(
+            f"{result['num_cities']:>7} cities  seed {result['seed']}  "
+            f"{result['engine']:<9} speed x{speed:.2f}  distance x{quality:.3f}  "
+            f"memory {memory:+.1f} MB"
+        )
+        if speed < 1 - tolerance or quality > 1 + tolerance:
+            regressions.append(key(result))
+        elif memory > tolerance * max(reference["peak_memory_mb"], 10.0):
+            regressions.append(key(result))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the TSP annealer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES))
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--time-budget", type=float, default=60.0)
+    parser.add_argument("--output", default="tsp_bench.json")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument(
+        "--compare-operators",
+        action="store_true",
+        help="only run the 2-opt vs adaptive operator comparison",
+    )
+    args = parser.parse_args()
+
+    if args.compare_operators:
+        rows = compare_operators()
+
+        print(f"{'seed':>4}  {'engine':<9}  {'best distance':>13}  {'time (s)':>8}")
+        for row in rows:
+            print(
+                f"{row['seed']:>4}  {row['engine']:<9}  "
+                f"{row['best_distance']:>13.1f}  {row['seconds']:>8.2f}"
+            )
+        for engine in ("2-opt", "adaptive"):
+            mean = np.mean([r["best_distance"] for r in rows if r["engine"] == engine])
+            print(f"mean best distance ({engine}): {mean:.1f}")
+    else:
+        report = run_suite(
+            args.sizes, args.seeds, args.engines, args.iterations, args.time_budget
+        )
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Results saved to {args.output}")
+
+        if args.baseline:
+            with open(args.baseline) as f:
+                regressions = compare_to_baseline(
+                    report, json.load(f), args.tolerance
+                )
+            if regressions:
+                raise SystemExit(f"Regressions against baseline: {regressions}")
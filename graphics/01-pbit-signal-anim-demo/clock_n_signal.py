@@ -1,117 +1,495 @@
-import random
+import json
+import os
+import struct
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from matplotlib.animation import FuncAnimation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import GifImagePlugin, Image
 
 
-def generate_pbit_data(
+def _pbit_rngs(seed):
+    """
+    Independent generators for the voltage levels and the per-period
+    response draws, so each stream is consumed in a fixed order no matter
+    how the trace is produced
+    """
+    voltage_seq, response_seq = np.random.SeedSequence(seed).spawn(2)
+    return np.random.default_rng(voltage_seq), np.random.default_rng(response_seq)
+
+
+def _voltage_levels(duration, sampling_rate, voltage_change_interval, rng):
+    """Sample index bounds of each voltage interval and its random voltage"""
+    voltage_intervals = int(duration / voltage_change_interval)
+    bounds = (
+        np.arange(voltage_intervals + 1) * voltage_change_interval * sampling_rate
+    ).astype(np.int64)
+    bounds = np.minimum(bounds, int(duration * sampling_rate))
+    # Random voltage between -2.5 and 2.5
+    voltages = rng.uniform(-2.5, 2.5, voltage_intervals)
+    return bounds, voltages
+
+
+def _voltage_staircase(bounds, voltages, start, stop):
+    """Voltage of samples start..stop-1; zero past the last full interval"""
+    voltage = np.zeros(stop - start)
+    counts = np.diff(np.clip(bounds, start, stop))
+    levels = np.repeat(voltages, counts)
+    voltage[: len(levels)] = levels
+    return voltage
+
+
+def _peak_kernel(width=20):
+    """Offsets and Gaussian shape of one response peak"""
+    offsets = np.arange(-width, width)
+    sigma = width / 3  # Make peak width reasonable
+    peak_height = 1.0  # Full height
+    return offsets, peak_height * np.exp(-0.5 * (offsets / sigma) ** 2)
+
+
+def _place_peaks(response, peak_pos, offset, n_samples, kernel_offsets, kernel):
+    """
+    Write a peak centred on each global sample index in peak_pos into
+    response, which holds the samples offset..offset+len(response)-1.
+    Peaks are clipped to the trace and to the response window.
+    """
+    idx = peak_pos[:, None] + kernel_offsets[None, :]
+    inside = (idx >= max(offset, 0)) & (idx < min(offset + len(response), n_samples))
+    shape = np.broadcast_to(kernel, idx.shape)
+    response[idx[inside] - offset] = shape[inside]
+
+
+def _voltage_at(bounds, voltages, idx):
+    """Voltage at the global sample indices idx"""
+    interval = np.searchsorted(bounds, idx, side="right") - 1
+    valid = (interval >= 0) & (interval < len(voltages))
+    if not len(voltages):
+        return np.zeros(np.shape(idx))
+    return np.where(valid, voltages[np.clip(interval, 0, len(voltages) - 1)], 0.0)
+
+
+def iter_pbit_chunks(
     duration=30,  # seconds
     sampling_rate=1000,  # samples per second
     clock_freq=2,  # Hz
-    voltage_change_interval=3,  # seconds - change voltage every 4 seconds
+    voltage_change_interval=3,  # seconds
+    seed=None,
+    chunk_size=1_000_000,  # samples per yielded chunk
 ):
-    """Generate clock signal and pbit response data with randomly changing voltages"""
-    # Time vector
-    t = np.linspace(0, duration, int(duration * sampling_rate))
-
-    # Create dataframe
-    df = pd.DataFrame({"time": t})
-
-    # Generate clock signal (square wave)
-    df["clock_signal"] = np.where(np.sin(2 * np.pi * clock_freq * t) > 0, 1, 0)
-
-    # Generate voltage signal (changes every voltage_change_interval seconds)
-    voltage = np.zeros_like(t)
-    df["voltage"] = voltage  # Initialize voltage column
-
-    # Assign random voltages for each interval
-    voltage_intervals = int(duration / voltage_change_interval)
-    for i in range(voltage_intervals):
-        start_idx = int(i * voltage_change_interval * sampling_rate)
-        end_idx = int((i + 1) * voltage_change_interval * sampling_rate)
-        if end_idx > len(t):
-            end_idx = len(t)
-
-        # Random voltage between -2.5 and 2.5
-        random_voltage = random.uniform(-2.5, 2.5)
-        df.loc[start_idx : end_idx - 1, "voltage"] = random_voltage
-
-    # Find the clock high periods
-    clock_high_starts = []
-    clock_high_ends = []
-
-    current_state = 0
-    for i, val in enumerate(df["clock_signal"]):
-        if val == 1 and current_state == 0:  # Rising edge
-            clock_high_starts.append(i)
-            current_state = 1
-        elif val == 0 and current_state == 1:  # Falling edge
-            clock_high_ends.append(i)
-            current_state = 0
-
-    # Make sure we have the same number of starts and ends
-    if len(clock_high_starts) > len(clock_high_ends):
-        clock_high_ends.append(len(t))  # Add end of array if last period is cut off
-
-    print(f"Found {len(clock_high_starts)} clock high periods")
-
-    # Generate pbit response
-    pbit_response = np.zeros_like(t)
-
-    responses_generated = 0
-    for start_idx, end_idx in zip(clock_high_starts, clock_high_ends):
-        # Get the voltage at this clock period
-        period_voltage = df.loc[start_idx, "voltage"]
-
-        # Calculate probability using tanh
-        p_one = 0.5 * (1 + np.tanh(period_voltage))
-
-        # Decide if there will be a response in this clock period
-        if np.random.random() < p_one:
-            responses_generated += 1
-
-            # Place the peak at the middle of the clock high period
-            peak_pos = start_idx + (end_idx - start_idx) // 2
-
-            # Create a peak (Gaussian shape)
-            width = 20  # Width of the peak
-            idx_range = np.arange(
-                max(0, peak_pos - width), min(len(t), peak_pos + width)
+    """
+    Generate the p-bit trace as a stream of DataFrames of chunk_size samples
+    (the last one may be shorter), with the same columns and values as the
+    whole-trace generator for the same seed.
+
+    Clock phase, an open clock high period and peaks that spill over a
+    chunk boundary are carried from one chunk to the next. Samples are only
+    yielded once no later peak can reach them, so memory is bounded by the
+    chunk size and clock period, not by the trace duration.
+    """
+    voltage_rng, response_rng = _pbit_rngs(seed)
+    n_samples = int(duration * sampling_rate)
+    dt = duration / (n_samples - 1) if n_samples > 1 else 0.0
+    bounds, voltages = _voltage_levels(
+        duration, sampling_rate, voltage_change_interval, voltage_rng
+    )
+    kernel_offsets, kernel = _peak_kernel()
+    width = -kernel_offsets[0]
+
+    def sample_times(start, stop):
+        # Same values as np.linspace(0, duration, n_samples)[start:stop]
+        t = np.arange(start, stop) * dt
+        if stop == n_samples and stop > start:
+            t[-1] = duration
+        return t
+
+    generated = emitted = 0
+    clock_buffer = np.zeros(0, dtype=np.int64)
+    response_buffer = np.zeros(0)
+    last_clock = 0
+    pending_start = None  # Rising edge whose falling edge is not generated yet
+    carried_peaks = np.zeros(0, dtype=np.int64)  # Peaks reaching past `generated`
+    n_periods = n_responses = 0
+
+    while emitted < n_samples:
+        if generated < n_samples:
+            stop = min(generated + chunk_size, n_samples)
+
+            # Generate clock signal (square wave)
+            t = sample_times(generated, stop)
+            clock = np.where(np.sin(2 * np.pi * clock_freq * t) > 0, 1, 0)
+
+            # Clock high periods completed in this chunk
+            edges = np.diff(clock, prepend=last_clock)
+            starts = generated + np.flatnonzero(edges == 1)
+            ends = generated + np.flatnonzero(edges == -1)
+            if pending_start is not None:
+                starts = np.insert(starts, 0, pending_start)
+            pending_start = None
+            if len(starts) > len(ends):
+                if stop == n_samples:
+                    # Add end of array if last period is cut off
+                    ends = np.append(ends, n_samples)
+                else:
+                    pending_start, starts = starts[-1], starts[:-1]
+
+            clock_buffer = np.concatenate([clock_buffer, clock])
+            response_buffer = np.concatenate([response_buffer, np.zeros(len(clock))])
+            last_clock = clock[-1]
+            generated = stop
+
+            # Decide whether each completed period responds
+            p_one = 0.5 * (1 + np.tanh(_voltage_at(bounds, voltages, starts)))
+            fired = response_rng.random(len(starts)) < p_one
+            n_periods += len(starts)
+            n_responses += int(fired.sum())
+
+            # Earlier peaks first, so later ones overwrite them as in one pass
+            peak_pos = starts[fired] + (ends[fired] - starts[fired]) // 2
+            peak_pos = np.concatenate([carried_peaks, peak_pos])
+            _place_peaks(
+                response_buffer, peak_pos, emitted, n_samples, kernel_offsets, kernel
             )
-            peak_height = 1.0  # Full height
-            sigma = width / 3  # Make peak width reasonable
-            peak = peak_height * np.exp(-0.5 * ((idx_range - peak_pos) / sigma) ** 2)
+            carried_peaks = peak_pos[peak_pos + width > generated]
+
+        # Samples before `ready` can no longer be touched by a future peak
+        if generated == n_samples:
+            ready = n_samples
+        else:
+            horizon = generated if pending_start is None else pending_start
+            ready = max(emitted, horizon - width)
+
+        while ready - emitted >= chunk_size or (ready == n_samples > emitted):
+            stop = min(emitted + chunk_size, ready)
+            size = stop - emitted
+            voltage = _voltage_staircase(bounds, voltages, emitted, stop)
+            yield pd.DataFrame(
+                {
+                    "time": sample_times(emitted, stop),
+                    "clock_signal": clock_buffer[:size],
+                    "voltage": voltage,
+                    "pbit_response": response_buffer[:size],
+                    # Calculate probability column (for reference)
+                    "probability": 0.5 * (1 + np.tanh(voltage)),
+                }
+            )
+            clock_buffer = clock_buffer[size:]
+            response_buffer = response_buffer[size:]
+            emitted = stop
+
+    print(f"Found {n_periods} clock high periods")
+    print(f"Generated {n_responses} responses out of {n_periods} clock periods")
+
+
+##############################################################################
+# Binary columnar trace format (.pbit)
+##############################################################################
+# A .pbit file is a fixed 4 KiB header followed by one contiguous column per
+# signal, each 64-byte aligned, so every column can be memory-mapped as-is.
+# The header is the magic bytes, a little-endian uint32 length and a JSON
+# document with the generation parameters, the sample count and each
+# column's dtype and byte offset. Time is not stored: sample k is at
+# k * duration / (n_samples - 1), as with np.linspace.
+PBIT_MAGIC = b"PBITRACE"
+PBIT_HEADER_SIZE = 4096
+PBIT_COLUMNS = {
+    "clock_signal": np.uint8,
+    "voltage": np.float32,
+    "pbit_response": np.float32,
+}
+
+
+def _pbit_header(n_samples, metadata):
+    """Header bytes and column layout for a trace of n_samples"""
+    columns = {}
+    offset = PBIT_HEADER_SIZE
+    for name, dtype in PBIT_COLUMNS.items():
+        columns[name] = {"dtype": np.dtype(dtype).str, "offset": offset}
+        offset += n_samples * np.dtype(dtype).itemsize
+        offset = -(-offset // 64) * 64
+    header = json.dumps(
+        {"version": 1, **metadata, "n_samples": n_samples, "columns": columns}
+    ).encode()
+    prefix = PBIT_MAGIC + struct.pack("<I", len(header))
+    if len(prefix) + len(header) > PBIT_HEADER_SIZE:
+        raise ValueError("p-bit trace metadata does not fit in the header")
+    return (prefix + header).ljust(PBIT_HEADER_SIZE, b"\0"), columns, offset
+
+
+def write_pbit_trace(filename, chunks, n_samples, metadata):
+    """
+    Write trace chunks (DataFrames or mappings with the PBIT_COLUMNS) to a
+    .pbit file of n_samples samples. The file is sized up front and each
+    chunk is copied straight into the memory-mapped columns, so chunks can
+    come from a generator without holding the trace in memory.
+    """
+    header, columns, size = _pbit_header(n_samples, metadata)
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.truncate(size)
+
+    mapped = {
+        name: np.memmap(
+            filename,
+            dtype=spec["dtype"],
+            mode="r+",
+            offset=spec["offset"],
+            shape=(n_samples,),
+        )
+        for name, spec in columns.items()
+    }
+    written = 0
+    for chunk in chunks:
+        chunk_len = len(chunk["voltage"])
+        for name, column in mapped.items():
+            column[written : written + chunk_len] = np.asarray(chunk[name])
+        written += chunk_len
+    for column in mapped.values():
+        column.flush()
+    if written != n_samples:
+        raise ValueError(f"Expected {n_samples} samples, got {written}")
+    return filename
 
-            # Assign peak to response
-            pbit_response[idx_range] = peak
 
-    print(
-        f"Generated {responses_generated} responses out of {len(clock_high_starts)} clock periods"
-    )
+def read_pbit_trace(filename):
+    """
+    Open a .pbit file; returns (columns, metadata), where columns maps each
+    signal name to a read-only memory-mapped array (no data is copied)
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(PBIT_MAGIC)) != PBIT_MAGIC:
+            raise ValueError(f"{filename} is not a p-bit trace file")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        metadata = json.loads(f.read(header_len))
+
+    columns = {
+        name: np.memmap(
+            filename,
+            dtype=spec["dtype"],
+            mode="r",
+            offset=spec["offset"],
+            shape=(metadata["n_samples"],),
+        )
+        for name, spec in metadata["columns"].items()
+    }
+    return columns, metadata
+
+
+class SampleTimes:
+    """
+    Time column of a uniformly sampled trace, k * duration / (n_samples - 1)
+    as with np.linspace, computed only for the indices asked for instead of
+    stored. Supports len(), integer, slice and index-array lookups, and
+    exposes t0 and dt for `TimeWindowIndex`.
+    """
+
+    def __init__(self, duration, n_samples):
+        self.duration = float(duration)
+        self.n = n_samples
+        self.t0 = 0.0
+        self.dt = self.duration / (n_samples - 1) if n_samples > 1 else 0.0
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            k = np.arange(*index.indices(self.n))
+        else:
+            k = np.asarray(index)
+            k = np.where(k < 0, k + self.n, k)
+            if np.any((k < 0) | (k >= self.n)):
+                raise IndexError(f"index out of range for {self.n} samples")
+        t = k * self.dt
+        if self.n > 1:
+            # The last sample is exactly duration, as with np.linspace
+            t = np.where(k == self.n - 1, self.duration, t)
+        return t[()]
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self[:], dtype=dtype)
+
+
+def load_pbit_columns(filename):
+    """
+    Trace columns from either a .pbit file (memory-mapped, with time as a
+    `SampleTimes` built from the metadata) or a CSV (arrays)
+    """
+    if str(filename).endswith(".pbit"):
+        columns, metadata = read_pbit_trace(filename)
+        columns["time"] = SampleTimes(metadata["duration"], metadata["n_samples"])
+        return columns
+    df = pd.read_csv(filename)
+    return {name: df[name].to_numpy() for name in df.columns}
 
-    # Add to dataframe
-    df["pbit_response"] = pbit_response
 
-    # Calculate probability column (for reference)
-    df["probability"] = 0.5 * (1 + np.tanh(df["voltage"]))
+def generate_pbit_data(
+    duration=30,  # seconds
+    sampling_rate=1000,  # samples per second
+    clock_freq=2,  # Hz
+    voltage_change_interval=3,  # seconds - change voltage every 4 seconds
+    seed=None,
+    chunk_size=None,  # samples per chunk, None for the whole trace at once
+    filename="pbit_data.csv",
+):
+    """
+    Generate clock signal and pbit response data with randomly changing voltages.
+
+    Fully array-based: clock edges come from np.diff, the voltage staircase
+    from np.repeat, the response of every clock period from one vectorized
+    Bernoulli draw, and the peaks are scattered in a single fancy-indexed
+    assignment. seed makes the trace reproducible.
+
+    With chunk_size, the trace is produced by `iter_pbit_chunks` and each
+    chunk is appended to the output as it is generated, so memory stays
+    flat however long the trace is. The output is the same either way.
+
+    A filename ending in .pbit is written in the binary columnar format
+    (see `write_pbit_trace`) with the generation parameters and seed in its
+    header; anything else is written as CSV.
+    """
+    n_samples = int(duration * sampling_rate)
+    if chunk_size is None:
+        chunk_size = max(n_samples, 1)
+    if seed is None:
+        # Draw a seed so it can be recorded with the trace
+        seed = np.random.SeedSequence().entropy
+    chunks = iter_pbit_chunks(
+        duration,
+        sampling_rate,
+        clock_freq,
+        voltage_change_interval,
+        seed=seed,
+        chunk_size=chunk_size,
+    )
 
-    # Save to CSV
-    filename = "pbit_data.csv"
-    df.to_csv(filename, index=False)
+    if str(filename).endswith(".pbit"):
+        metadata = {
+            "duration": duration,
+            "sampling_rate": sampling_rate,
+            "clock_freq": clock_freq,
+            "voltage_change_interval": voltage_change_interval,
+            "seed": seed,
+        }
+        write_pbit_trace(filename, chunks, n_samples, metadata)
+    else:
+        # Save to CSV, chunk by chunk
+        with open(filename, "w", newline="") as f:
+            for index, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=index == 0, index=False)
     print(f"Data saved to {filename}")
 
     return filename
 
 
-def animate_pbit_data(csv_file):
-    """Create animation showing clock signal, pbit response, and probability distribution"""
-    # Read data
-    df = pd.read_csv(csv_file)
-
-    # Create figure with 3 subplots
-    fig = plt.figure(figsize=(12, 10))
+class TimeWindowIndex:
+    """
+    Slice bounds for time windows over a sorted time column.
+
+    For uniformly sampled time the bounds are computed arithmetically from
+    t0 and dt and checked against the neighbouring samples, falling back to
+    a binary search only when the guess is off (non-uniform or rounded
+    time), so a lookup costs O(1) regardless of trace length. `window`
+    selects exactly the samples with start <= time <= end.
+    """
+
+    def __init__(self, time):
+        self.time = time
+        self.n = len(time)
+        if isinstance(time, SampleTimes):
+            # Uniform by construction, straight from the trace header
+            self.t0, self.dt = time.t0, time.dt
+            return
+        self.t0 = float(time[0]) if self.n else 0.0
+        self.dt = float(time[-1] - time[0]) / (self.n - 1) if self.n > 1 else 0.0
+
+    def _bound(self, t, side):
+        """First index with time >= t (side="left") or time > t (side="right")"""
+        time, n = self.time, self.n
+
+        def is_bound(k):
+            if side == "left":
+                return (k == 0 or time[k - 1] < t) and (k == n or time[k] >= t)
+            return (k == 0 or time[k - 1] <= t) and (k == n or time[k] > t)
+
+        if self.dt > 0:
+            guess = int(np.ceil((t - self.t0) / self.dt))
+            for k in (guess, guess + 1, guess - 1):
+                if 0 <= k <= n and is_bound(k):
+                    return k
+            if guess < 0 or guess > n:
+                return min(max(guess, 0), n)
+        return int(np.searchsorted(time, t, side=side))
+
+    def window(self, start, end):
+        """Slice of the samples with start <= time <= end"""
+        return slice(self._bound(start, "left"), self._bound(end, "right"))
+
+
+class MinMaxPyramid:
+    """
+    Level-of-detail min/max pyramid over one trace column.
+
+    Level k holds the minimum and maximum of each block of 2**(k+1)
+    samples, so any window can be drawn from the coarsest level that still
+    has one block per pixel column. Each block is drawn as a vertical
+    min-max stroke, which keeps every peak visible however far the trace is
+    decimated. The pyramid takes about as much memory as the column itself.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.levels = []
+        low = high = np.asarray(values)
+        while len(low) > 1:
+            if len(low) % 2:
+                # Pad odd lengths with the last block, which leaves min/max unchanged
+                low, high = np.append(low, low[-1]), np.append(high, high[-1])
+            low = np.minimum(low[0::2], low[1::2])
+            high = np.maximum(high[0::2], high[1::2])
+            self.levels.append((low, high))
+
+    def decimate(self, window, max_points):
+        """
+        Sample indices and values to draw for the samples in window (a
+        slice), with at most max_points points. Windows that already fit are
+        returned as-is (views of the column); otherwise each block gives its
+        minimum and maximum at the index of the block start.
+        """
+        n = window.stop - window.start
+        if n <= max_points:
+            return window, self.values[window]
+
+        for level, (low, high) in enumerate(self.levels):
+            block = 2 ** (level + 1)
+            first, last = window.start // block, -(-window.stop // block)
+            if 2 * (last - first) <= max_points:
+                break
+        indices = np.repeat(np.arange(first, last) * block, 2)
+        values = np.column_stack([low[first:last], high[first:last]]).ravel()
+        return indices, values
+
+
+def _draw_pbit_figure(fig, trace, fps=20):
+    """
+    Lay out the clock, pbit response and probability plots on fig for the
+    trace columns from `load_pbit_columns`; returns (init, update, frames),
+    the animation callbacks and frame count at fps frames per trace second.
+    Shared by the interactive animation and the parallel exporter.
+    """
+    time = trace["time"]
+    time_index = TimeWindowIndex(time)
+
+    # Min/max pyramids for drawing long windows at screen resolution
+    clock_pyramid = MinMaxPyramid(trace["clock_signal"])
+    pbit_pyramid = MinMaxPyramid(trace["pbit_response"])
+
+    # Create 3 subplots
     gs = fig.add_gridspec(3, 1, height_ratios=[1, 1, 1.5])
 
     # Create subplots
@@ -172,6 +550,9 @@ def animate_pbit_data(csv_file):
     # Add legends
     ax3.legend(loc="upper left")
 
+    # At most 2 points (one min/max stroke) per pixel column of the time plots
+    max_points = 2 * int(np.ceil(ax2.get_window_extent().width))
+
     # Initialization function
     def init():
         clock_line.set_data([], [])
@@ -192,7 +573,7 @@ def animate_pbit_data(csv_file):
     # Update function for animation
     def update(frame):
         # Calculate current time based on frame
-        current_time = frame / 20  # Assuming 20 fps
+        current_time = frame / fps
 
         # Set visible window
         start_time = max(0, current_time - time_window / 2)
@@ -202,14 +583,15 @@ def animate_pbit_data(csv_file):
         ax1.set_xlim(start_time, end_time)
         ax2.set_xlim(start_time, end_time)
 
-        # Get data for the visible window
-        visible_df = df[(df["time"] >= start_time) & (df["time"] <= end_time)]
+        # Get data for the visible window (slices are views, not copies)
+        visible = time_index.window(start_time, end_time)
+        n_visible = visible.stop - visible.start
 
-        if not visible_df.empty:
+        if n_visible > 0:
             # Get current voltage (from middle of visible window)
-            middle_idx = len(visible_df) // 2
-            if middle_idx < len(visible_df):
-                current_voltage = visible_df.iloc[middle_idx]["voltage"]
+            middle_idx = n_visible // 2
+            if middle_idx < n_visible:
+                current_voltage = float(trace["voltage"][visible.start + middle_idx])
                 current_prob = 0.5 * (1 + np.tanh(current_voltage))
 
                 # Update title with current voltage and probability
@@ -230,13 +612,12 @@ def animate_pbit_data(csv_file):
                 # Update probability text
                 prob_text.set_text(f"P(1) = {current_prob:.4f}")
 
-            # Update time plots with visible data
-            t_data = visible_df["time"]
-            clock_data = visible_df["clock_signal"]
-            pbit_data = visible_df["pbit_response"]
+            # Update time plots with visible data, decimated to the axis width
+            clock_idx, clock_data = clock_pyramid.decimate(visible, max_points)
+            pbit_idx, pbit_data = pbit_pyramid.decimate(visible, max_points)
 
-            clock_line.set_data(t_data, clock_data)
-            pbit_line.set_data(t_data, pbit_data)
+            clock_line.set_data(time[clock_idx], clock_data)
+            pbit_line.set_data(time[pbit_idx], pbit_data)
 
         return [
             clock_line,
@@ -247,11 +628,27 @@ def animate_pbit_data(csv_file):
             prob_text,
         ]
 
-    # Create animation
     # More frames for smoother animation
-    total_duration = df["time"].max()
-    frames = int(total_duration * 20)  # 20 fps
+    total_duration = time[-1]
+    frames = int(total_duration * fps)
+
+    return init, update, frames
+
 
+def animate_pbit_data(trace_file):
+    """
+    Create animation showing clock signal, pbit response, and probability distribution.
+
+    trace_file is a CSV or a binary .pbit trace from `generate_pbit_data`.
+    """
+    # Read data
+    trace = load_pbit_columns(trace_file)
+
+    # Create figure
+    fig = plt.figure(figsize=(12, 10))
+    init, update, frames = _draw_pbit_figure(fig, trace)
+
+    # Create animation
     ani = FuncAnimation(
         fig, update, frames=frames, init_func=init, blit=True, interval=50
     )
@@ -265,19 +662,169 @@ def animate_pbit_data(csv_file):
     print("Animation saved as pbit_animation.gif")
 
 
+# Figure state of each export worker, built once by _init_export_worker
+_worker_figure = None
+
+
+def _init_export_worker(trace_file, fps, dpi):
+    """Load the trace (memory-mapped for .pbit) and build the figure once per worker"""
+    global _worker_figure
+    fig = Figure(figsize=(12, 10), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    init, update, _ = _draw_pbit_figure(fig, load_pbit_columns(trace_file), fps)
+    fig.tight_layout()
+    fig.subplots_adjust(top=0.9)  # Make room for the title
+    init()
+    _worker_figure = canvas, update, fps
+
+
+def _gif_frame(rgb, fps, header=False):
+    """
+    Encode one RGB frame as a GIF image block with its own palette and a
+    1/fps delay, led by the file header and loop extension when header is set
+    """
+    image = rgb.quantize()
+    blocks = []
+    if header:
+        blocks += GifImagePlugin.getheader(image, info={"loop": 0})[0]
+    blocks += GifImagePlugin.getdata(
+        image, duration=1000 / fps, include_color_table=True
+    )
+    return b"".join(blocks)
+
+
+def _render_pbit_frames(frames, gif=False):
+    """
+    Render a chunk of frames off-screen (worker side); returns RGB buffers,
+    or encoded GIF blocks with gif
+    """
+    canvas, update, fps = _worker_figure
+    buffers = []
+    for frame in frames:
+        update(frame)
+        canvas.draw()
+        rgb = np.asarray(canvas.buffer_rgba())[..., :3]
+        if gif:
+            buffers.append(_gif_frame(Image.fromarray(rgb), fps, frame == 0))
+        else:
+            buffers.append(rgb.tobytes())
+    width, height = canvas.get_width_height()
+    return width, height, buffers
+
+
+def export_pbit_animation(
+    trace_file,
+    filename="pbit_animation.gif",
+    fps=20,
+    dpi=100,
+    max_workers=None,
+    chunk_size=20,
+    ffmpeg="ffmpeg",
+):
+    """
+    Render the p-bit animation in a process pool and assemble it in frame order.
+
+    Each worker rebuilds the figure from trace_file (best a .pbit trace, so
+    it is memory-mapped rather than parsed per worker) and renders chunks
+    of chunk_size frames off-screen. For a .gif the workers also quantize
+    and encode their frames, which are appended to the file as the chunks
+    complete; any other extension (e.g. .mp4) is encoded by streaming the
+    raw frames to ffmpeg. Either way at most max_workers + 1 chunks are in
+    flight, so memory does not grow with the length of the animation.
+    """
+    frames = int(load_pbit_columns(trace_file)["time"][-1] * fps)
+    chunks = [
+        range(start, min(start + chunk_size, frames))
+        for start in range(0, frames, chunk_size)
+    ]
+    max_workers = max_workers or os.cpu_count() or 1
+    gif = str(filename).endswith(".gif")
+
+    gif_file = open(filename, "wb") if gif else None
+    encoder = None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_export_worker,
+            initargs=(trace_file, fps, dpi),
+        ) as executor:
+            pending = deque()
+            next_chunk = 0
+            while pending or next_chunk < len(chunks):
+                # Keep the pool busy without buffering the whole animation
+                while next_chunk < len(chunks) and len(pending) <= max_workers:
+                    pending.append(
+                        executor.submit(
+                            _render_pbit_frames, list(chunks[next_chunk]), gif
+                        )
+                    )
+                    next_chunk += 1
+
+                width, height, buffers = pending.popleft().result()
+                if gif:
+                    gif_file.writelines(buffers)  # pyright: ignore
+                    continue
+                if encoder is None:
+                    encoder = subprocess.Popen(
+                        [
+                            ffmpeg,
+                            "-y",
+                            "-loglevel",
+                            "error",
+                            "-f",
+                            "rawvideo",
+                            "-pix_fmt",
+                            "rgb24",
+                            "-s",
+                            f"{width}x{height}",
+                            "-r",
+                            str(fps),
+                            "-i",
+                            "-",
+                            "-pix_fmt",
+                            "yuv420p",
+                            filename,
+                        ],
+                        stdin=subprocess.PIPE,
+                    )
+                for buffer in buffers:
+                    encoder.stdin.write(buffer)  # pyright: ignore
+        if gif_file is not None:
+            gif_file.write(b";")  # GIF trailer
+    finally:
+        # Let ffmpeg exit and release the file even when a worker failed
+        if gif_file is not None:
+            gif_file.close()
+        if encoder is not None:
+            encoder.stdin.close()  # pyright: ignore
+            encoder.wait()
+
+    if encoder is not None and encoder.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {filename}")
+    print(f"Animation saved as {filename}")
+    return filename
+
+
 # Main execution
 if __name__ == "__main__":
-    # Generate data and save to CSV
-    csv_file = "pbit_data.csv"
-    # csv_file = None
+    # Generate data and save to CSV (or to a binary trace, "pbit_data.pbit")
+    trace_file = "pbit_data.csv"
+    # trace_file = None
 
-    if csv_file is None:
-        csv_file = generate_pbit_data(
+    if trace_file is None:
+        trace_file = generate_pbit_data(
             duration=30,  # seconds
             sampling_rate=1000,  # samples per second
             clock_freq=2,  # Hz
             voltage_change_interval=3,  # seconds - change voltage every 4 seconds
         )
 
-    # Create animation from CSV
-    animate_pbit_data(csv_file)
+    # Render the animation file in parallel worker processes instead of
+    # animating on screen (use a .pbit trace for long runs)
+    parallel_export = False
+
+    # Create animation from the saved trace
+    if parallel_export:
+        export_pbit_animation(trace_file, "pbit_animation.gif")
+    else:
+        animate_pbit_data(trace_file)
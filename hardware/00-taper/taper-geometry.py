@@ -1,51 +1,85 @@
+import functools
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy.special import i1e
 
 
 ##############################################################################
 # 1) Klopfenstein Taper Function
 ##############################################################################
+def _klopfenstein_phi(z, A, n_nodes=64):
+    """
+    Klopfenstein's phi(z, A) = integral from 0 to z of
+    I1(A sqrt(1 - y^2)) / (A sqrt(1 - y^2)) dy, |z| <= 1, times exp(-A)
+    so it stays finite for large A. z and A broadcast together.
+
+    The integrand is smooth in y, so Gauss-Legendre quadrature on [0, z]
+    converges quickly.
+    """
+    s, w = np.polynomial.legendre.leggauss(n_nodes)
+    s, w = (s + 1) / 2, w / 2  # Nodes and weights on [0, 1]
+    z = np.asarray(z, dtype=float)[..., None]
+    A = np.asarray(A, dtype=float)[..., None]
+    t = A * np.sqrt(1 - (z * s) ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # I1(t) / t -> 1/2 as t -> 0
+        f = np.where(t > 0, i1e(t) / t, 0.5) * np.exp(t - A)
+    return z[..., 0] * np.sum(w * f, axis=-1)
+
+
 def klopfenstein_taper_profile(L, f_c, Z1, Z2, n_points=200, v=3e8):
     """
     Compute the Klopfenstein impedance profile Z(x) from x=0..L.
 
+        ln Z(x) = ln(Z1 Z2) / 2 + Gamma_0 / cosh(A) * A^2 * phi(2x/L - 1, A)
+
+    with Gamma_0 = ln(Z2 / Z1) / 2 and A = beta_c L. Above f_c the
+    reflection ripples at the floor Gamma_m = Gamma_0 / cosh(A); the profile
+    keeps steps of Gamma_m (in ln Z / 2) to Z1 and Z2 at its ends.
+
     Parameters:
     -----------
-    L      : float
+    L      : float or ndarray
         Total length of taper (meters).
-    f_c    : float
-        'Cutoff' or highest design frequency (Hz).
-    Z1     : float
+    f_c    : float or ndarray
+        Cutoff frequency (Hz), the lower edge of the passband.
+    Z1     : float or ndarray
         Impedance at x=0 (Ohms).
-    Z2     : float
+    Z2     : float or ndarray
         Impedance at x=L (Ohms).
     n_points : int
         Number of discrete points along the taper to compute.
     v      : float
         Phase velocity in the line (m/s).
 
+    Array parameters broadcast together and give one profile per design.
+
     Returns:
     --------
     x_arr : ndarray
-        Array of length n_points, position along the taper [m].
+        Array of shape (..., n_points), position along the taper [m].
     Zx    : ndarray
-        Array of length n_points, characteristic impedance at each x.
+        Array of shape (..., n_points), characteristic impedance at each x.
     """
-    gamma_0 = (Z2 - Z1) / (Z2 + Z1)  # Intrinsic reflection
+    L, f_c, Z1, Z2 = np.broadcast_arrays(
+        *(np.asarray(p, dtype=float) for p in (L, f_c, Z1, Z2))
+    )
+    gamma_0 = 0.5 * np.log(Z2 / Z1)  # Intrinsic reflection (log form)
     beta_c = 2 * np.pi * f_c / v  # Phase constant at f_c
-    B = L * beta_c  # Klopfenstein parameter
-    # Reflection "floor"
-    gamma_m = gamma_0 / np.cosh(B)  # For small B, ~ gamma_0
+    A = L * beta_c  # Klopfenstein parameter
 
-    x_arr = np.linspace(0, L, n_points)
-    # Reflection shape
-    numer = np.cosh(B * ((L / 2) - x_arr))
-    denom = np.cosh(B * (L / 2))
-    gamma_x = gamma_m * (numer / denom)
-
-    # Impedance at x
-    Zx = Z1 * np.sqrt((1 + gamma_x) / (1 - gamma_x))
-    return x_arr, Zx
+    x_arr = np.linspace(0, L, n_points, axis=-1)
+    z = np.linspace(-1, 1, n_points)
+    # A^2 / cosh(A) * phi, with phi carried as phi * exp(-A)
+    scale = gamma_0 * A**2 * 2 / (1 + np.exp(-2 * A))
+    log_Z = 0.5 * np.log(Z1 * Z2)[..., None] + scale[..., None] * _klopfenstein_phi(
+        z, A[..., None]
+    )
+    return x_arr, np.exp(log_Z)
 
 
 ##############################################################################
@@ -62,15 +96,18 @@ def microstrip_eps_eff(u, eps_r):
 def microstrip_Z0(u, eps_r):
     """
     Returns approximate Z0 (Ohms) for microstrip (width/height = u),
-    using piecewise formula.
+    using piecewise formula. u may be a scalar or an array.
     """
+    u = np.asarray(u, dtype=float)
     eeff = microstrip_eps_eff(u, eps_r)
-    if u <= 1.0:
+    Z0 = np.where(
+        u <= 1.0,
         # Narrow line
-        return (60.0 / np.sqrt(eeff)) * np.log(8.0 / u + 0.25 * u)
-    else:
+        (60.0 / np.sqrt(eeff)) * np.log(8.0 / u + 0.25 * u),
         # Wider line
-        return (120.0 * np.pi / np.sqrt(eeff)) / (u + 1.393 + 0.667 * np.log(u + 1.444))
+        (120.0 * np.pi / np.sqrt(eeff)) / (u + 1.393 + 0.667 * np.log(u + 1.444)),
+    )
+    return Z0[()]  # Scalar in, scalar out
 
 
 def invert_microstrip_Z0(Z_target, eps_r, tol=1e-5):
@@ -93,13 +130,438 @@ def invert_microstrip_Z0(Z_target, eps_r, tol=1e-5):
     return u_mid  # pyright: ignore
 
 
+def microstrip_synthesis_guess(Z_target, eps_r):
+    """
+    Closed-form (Wheeler) estimate of u = w/h for target Z0 (array-friendly),
+    used as the starting point of invert_microstrip_Z0_array.
+    """
+    Z_target = np.asarray(Z_target, dtype=float)
+    # Narrow-line synthesis, valid for u < 2
+    A = Z_target / 60.0 * np.sqrt((eps_r + 1) / 2) + (eps_r - 1) / (eps_r + 1) * (
+        0.23 + 0.11 / eps_r
+    )
+    u_narrow = 8.0 * np.exp(A) / (np.exp(2 * A) - 2)
+    # Wide-line synthesis, valid for u > 2
+    B = 377.0 * np.pi / (2 * Z_target * np.sqrt(eps_r))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        u_wide = (2 / np.pi) * (
+            B
+            - 1
+            - np.log(2 * B - 1)
+            + (eps_r - 1) / (2 * eps_r) * (np.log(B - 1) + 0.39 - 0.61 / eps_r)
+        )
+    return np.where((u_narrow > 0) & (u_narrow < 2), u_narrow, u_wide)
+
+
+def invert_microstrip_Z0_array(Z_target, eps_r, tol=1e-6, max_iter=100, u0=None):
+    """
+    Vectorized inverse of microstrip_Z0(...): u = w/h for every target Z0
+    at once.
+
+    Solves in log(u) with a safeguarded Newton iteration: each point keeps
+    a bracket [1e-6, 1e4] that shrinks with every evaluation (Z0 decreases
+    with u), and falls back to bisection whenever the Newton step leaves
+    it. Starting from the closed-form synthesis estimate, most points
+    converge in a few steps; only the unconverged ones are re-evaluated.
+
+    Parameters:
+    -----------
+    Z_target : float or ndarray
+        Target impedance(s) (Ohms).
+    eps_r    : float
+        Substrate dielectric constant.
+    tol      : float
+        Tolerance on |Z0(u) - Z_target| (Ohms).
+    max_iter : int
+        Iteration limit (bisection alone needs ~80 to reach machine precision).
+    u0       : float or ndarray, optional
+        Starting w/h (e.g. from lookup_microstrip_u); default is the
+        closed-form synthesis estimate.
+
+    Returns:
+    --------
+    u : float or ndarray
+        w/h with the shape of Z_target.
+    """
+    Z_target = np.asarray(Z_target, dtype=float)
+    Z_flat = Z_target.ravel()
+    lo = np.full(Z_flat.shape, np.log(1e-6))
+    hi = np.full(Z_flat.shape, np.log(1e4))
+    if u0 is None:
+        guess = np.nan_to_num(microstrip_synthesis_guess(Z_flat, eps_r), nan=1.0)
+    else:
+        guess = np.broadcast_to(np.asarray(u0, dtype=float), Z_target.shape).ravel()
+    s = np.log(np.clip(guess, 1e-6, 1e4))
+
+    active = np.arange(Z_flat.size)
+    ds = 1e-7  # log(u) step of the finite-difference derivative
+    for _ in range(max_iter):
+        s_a, Z_a = s[active], Z_flat[active]
+        f = microstrip_Z0(np.exp(s_a), eps_r) - Z_a
+        # Z0 too high => u too small, so the root lies above s
+        lo[active] = np.where(f > 0, s_a, lo[active])
+        hi[active] = np.where(f > 0, hi[active], s_a)
+
+        keep = (np.abs(f) >= tol) & (hi[active] - lo[active] > 1e-12)
+        active, s_a, Z_a, f = active[keep], s_a[keep], Z_a[keep], f[keep]
+        if not active.size:
+            break
+
+        slope = (microstrip_Z0(np.exp(s_a + ds), eps_r) - Z_a - f) / ds
+        with np.errstate(invalid="ignore", divide="ignore"):
+            step = s_a - f / slope
+        inside = (step > lo[active]) & (step < hi[active])
+        s[active] = np.where(inside, step, 0.5 * (lo[active] + hi[active]))
+
+    return np.exp(s).reshape(Z_target.shape)[()]
+
+
+##############################################################################
+# 2b) Cached Z0 -> w/h Inverse Table
+##############################################################################
+# Tables are kept per eps_r in an in-process LRU and saved as .npz files in
+# TABLE_CACHE_DIR (set it to None to disable the on-disk cache).
+TABLE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "taper-geometry")
+TABLE_VERSION = 1
+
+
+def _build_inverse_table(eps_r, rtol):
+    """
+    Nodes (log Z0 ascending, log u) of the inverse table, refined until
+    linear interpolation between them is within rtol in u
+    """
+    n_side = 512
+    while True:
+        # The two formula regimes meet at u = 1 with a small jump in Z0;
+        # u = 1 is a node on both sides, so targets in the jump map to u = 1
+        u = np.concatenate(
+            [np.geomspace(1e-6, 1.0, n_side), np.geomspace(1.0, 1e4, n_side)]
+        )
+        Z = microstrip_Z0(u, eps_r)
+        Z[n_side] = microstrip_Z0(np.nextafter(1.0, 2.0), eps_r)
+        log_Z, log_u = np.log(Z[::-1]), np.log(u[::-1])
+
+        # Interpolation error at the midpoints between nodes
+        u_mid = np.sqrt(u[1:] * u[:-1])
+        u_mid = u_mid[u_mid != 1.0]
+        approx = np.interp(np.log(microstrip_Z0(u_mid, eps_r)), log_Z, log_u)
+        max_error = float(np.max(np.abs(np.expm1(approx - np.log(u_mid)))))
+        if max_error <= rtol or n_side >= 2**20:
+            return log_Z, log_u, max_error
+        n_side *= 2
+
+
+@functools.lru_cache(maxsize=32)
+def microstrip_inverse_table(eps_r, rtol=1e-4, cache_dir=None):
+    """
+    Inverse table of microstrip_Z0(...) for one substrate: log Z0 nodes
+    (ascending) and the matching log u, on a log-spaced u grid from 1e-6 to
+    1e4 dense enough that linear interpolation is within rtol in u.
+
+    Returns (log_Z, log_u, max_error), max_error being the measured
+    interpolation bound. Tables are cached in process and, when cache_dir
+    is given, on disk, so each eps_r is only built once.
+    """
+    path = None
+    if cache_dir is not None:
+        name = f"microstrip_inverse_v{TABLE_VERSION}_er{eps_r!r}_rtol{rtol!r}.npz"
+        path = os.path.join(cache_dir, name)
+        try:
+            with np.load(path) as table:
+                return table["log_Z"], table["log_u"], float(table["max_error"])
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            pass  # Missing, truncated or corrupt, rebuild below
+
+    log_Z, log_u, max_error = _build_inverse_table(eps_r, rtol)
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a partial table
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, log_Z=log_Z, log_u=log_u, max_error=max_error)
+        os.replace(tmp_path, path)
+    return log_Z, log_u, max_error
+
+
+def lookup_microstrip_u(Z_target, eps_r, polish=True, tol=1e-6, rtol=1e-4):
+    """
+    u = w/h for target Z0 (scalar or array) from the cached inverse table.
+
+    Without polish the result is the table interpolation, within the
+    table's max_error (relative, in u). With polish, that is the starting
+    point of invert_microstrip_Z0_array, which then only needs a Newton
+    step or two to reach tol (Ohms).
+    """
+    log_Z, log_u, _ = microstrip_inverse_table(float(eps_r), rtol, TABLE_CACHE_DIR)
+    Z_target = np.asarray(Z_target, dtype=float)
+    u = np.exp(np.interp(np.log(Z_target), log_Z, log_u))
+    if polish:
+        return invert_microstrip_Z0_array(Z_target, eps_r, tol=tol, u0=u)
+    return u[()]
+
+
+##############################################################################
+# 2c) Reflection Response of a Discretized Taper
+##############################################################################
+def microstrip_phase_velocity(u, eps_r, c=3e8):
+    """Phase velocity (m/s) on a microstrip of width/height u (array-friendly)"""
+    return c / np.sqrt(microstrip_eps_eff(np.asarray(u, dtype=float), eps_r))
+
+
+def taper_reflection(x, Zx, freqs, v=3e8, Z_source=None, Z_load=None, chunk_size=None):
+    """
+    Reflection coefficient Gamma(f) at x=0 of a taper profile, from the
+    cascade of its uniform line sections.
+
+    Section k spans x[k]..x[k+1] with impedance (Zx[k] + Zx[k+1]) / 2 and
+    phase velocity v (a scalar or one value per section, e.g. from
+    microstrip_phase_velocity of the section widths). Every section's ABCD
+    matrix is built for all frequencies at once and the cascade is
+    multiplied as a pairwise tree of batched complex 2x2 products, so the
+    cost is log2(n_sections) vectorized steps per frequency chunk.
+
+    Several designs with the same number of points are evaluated in one
+    cascade by stacking their profiles along leading axes: x, Zx and v of
+    shape (..., n_points) or (..., n_sections), Z_source and Z_load of the
+    leading shape.
+
+    Parameters:
+    -----------
+    x, Zx    : ndarray
+        Taper profile(s), e.g. from klopfenstein_taper_profile.
+    freqs    : ndarray
+        Frequencies (Hz).
+    v        : float or ndarray
+        Phase velocity (m/s), scalar or per section (len(x) - 1).
+    Z_source : float or ndarray
+        Reference impedance at x=0 (default Zx[..., 0]).
+    Z_load   : float or ndarray
+        Termination at x=L (default Zx[..., -1]).
+    chunk_size : int
+        Frequencies per batch (default: about 2**20 designs x sections x
+        frequencies per batch).
+
+    Returns:
+    --------
+    gamma : ndarray (complex)
+        Gamma(f) of shape designs + freqs.shape; |Gamma| is np.abs(gamma).
+    """
+    x = np.asarray(x, dtype=float)
+    Zx = np.asarray(Zx, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    Z_source = Zx[..., 0] if Z_source is None else np.asarray(Z_source, dtype=float)
+    Z_load = Zx[..., -1] if Z_load is None else np.asarray(Z_load, dtype=float)
+
+    Z_sec = 0.5 * (Zx[..., 1:] + Zx[..., :-1])
+    # Electrical length per Hz of each section
+    theta_per_hz = 2 * np.pi * np.diff(x, axis=-1) / np.asarray(v, dtype=float)
+    designs = np.broadcast_shapes(
+        Z_sec.shape[:-1], theta_per_hz.shape[:-1], Z_source.shape, Z_load.shape
+    )
+    n_sections = Z_sec.shape[-1]
+    Z_sec = np.broadcast_to(Z_sec, designs + (n_sections,))[..., np.newaxis, :]
+    theta_per_hz = np.broadcast_to(theta_per_hz, designs + (n_sections,))
+    Z_source = np.broadcast_to(Z_source, designs)[..., np.newaxis]
+    Z_load = np.broadcast_to(Z_load, designs)[..., np.newaxis]
+    if chunk_size is None:
+        chunk_size = max(1, 2**20 // max(n_sections * int(np.prod(designs)), 1))
+
+    gamma = np.empty(designs + (freqs.size,), dtype=complex)
+    for start in range(0, freqs.size, chunk_size):
+        f = freqs.ravel()[start : start + chunk_size]
+        theta = f[:, np.newaxis] * theta_per_hz[..., np.newaxis, :]  # (..., F, K)
+        cos, sin = np.cos(theta), np.sin(theta)
+
+        # ABCD entries of every section, each an (..., F, K) array
+        A, B, C, D = cos + 0j, 1j * Z_sec * sin, 1j * sin / Z_sec, cos + 0j
+
+        # Pairwise cascade, (M0 M1)(M2 M3)..., keeping the section order;
+        # the 2x2 products are written out on whole arrays
+        while A.shape[-1] > 1:
+            odd = A.shape[-1] % 2
+            pairs = []
+            for M in (A, B, C, D):
+                pairs += [M[..., 0 : M.shape[-1] - odd : 2], M[..., 1::2]]
+            A1, A2, B1, B2, C1, C2, D1, D2 = pairs
+            products = (
+                A1 * A2 + B1 * C2,
+                A1 * B2 + B1 * D2,
+                C1 * A2 + D1 * C2,
+                C1 * B2 + D1 * D2,
+            )
+            if odd:
+                products = [
+                    np.concatenate([P, M[..., -1:]], axis=-1)
+                    for P, M in zip(products, (A, B, C, D))
+                ]
+            A, B, C, D = products
+        A, B, C, D = A[..., 0], B[..., 0], C[..., 0], D[..., 0]
+        Z_in = (A * Z_load + B) / (C * Z_load + D)
+        gamma[..., start : start + chunk_size] = (Z_in - Z_source) / (Z_in + Z_source)
+    return gamma.reshape(designs + freqs.shape)
+
+
+##############################################################################
+# 2d) Parallel Parameter Sweep
+##############################################################################
+SWEEP_PARAMS = ("L", "f_c", "Z1", "Z2", "eps_r", "h")
+SWEEP_METRICS = ("max_gamma", "w_min", "w_max")
+
+# Evaluated sweep points, keyed by settings and then by parameter values;
+# shared by all sweeps in this process and optionally saved to disk
+_sweep_cache = {}
+
+
+def _sweep_key(values):
+    """Cache key of one parameter point, robust to float noise in refined grids"""
+    return tuple(float(f"{value:.12g}") for value in values)
+
+
+def evaluate_tapers(points, band, n_points=200, n_freqs=500, c=3e8):
+    """
+    Max |Gamma| over band and the width range of each taper design.
+
+    points is an (N, 6) array of (L, f_c, Z1, Z2, eps_r, h) rows. All
+    Klopfenstein profiles are built in one broadcast call and synthesized
+    with lookup_microstrip_u (one inversion per eps_r for the whole batch).
+    Their reflections come from a single stacked taper_reflection cascade
+    of shape (designs, freqs, sections), terminated in Z1 and Z2 with
+    per-section microstrip phase velocities. Returns an (N, 3) array of
+    SWEEP_METRICS.
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    L, f_c, Z1, Z2, eps_r, h = points.T
+    freqs = np.linspace(band[0], band[1], n_freqs)
+    x, Zx = klopfenstein_taper_profile(L, f_c, Z1, Z2, n_points=n_points, v=c)
+
+    # Synthesize all widths of one substrate in a single vectorized call
+    u = np.empty_like(Zx)
+    for value in np.unique(eps_r):
+        rows = eps_r == value
+        u[rows] = lookup_microstrip_u(Zx[rows], value)
+
+    v = microstrip_phase_velocity(
+        0.5 * (u[:, 1:] + u[:, :-1]), eps_r[:, np.newaxis], c=c
+    )
+    gamma = taper_reflection(x, Zx, freqs, v, Z_source=Z1, Z_load=Z2)
+    return np.column_stack(
+        [np.abs(gamma).max(axis=1), u.min(axis=1) * h, u.max(axis=1) * h]
+    )
+
+
+def pareto_front(length, max_gamma):
+    """
+    Indices of the designs not beaten on both length and max |Gamma|
+    (lower is better for both), sorted by length
+    """
+    order = np.lexsort((max_gamma, length))
+    best_so_far = np.minimum.accumulate(max_gamma[order])
+    improves = np.concatenate([[True], max_gamma[order][1:] < best_so_far[:-1]])
+    return order[improves]
+
+
+def sweep_tapers(
+    grid,
+    band,
+    rl_min_db=20.0,
+    n_points=200,
+    n_freqs=500,
+    c=3e8,
+    max_workers=None,
+    block_size=32,
+    cache_path=None,
+):
+    """
+    Evaluate every combination of the parameter grid and find the length /
+    return-loss trade-off.
+
+    Parameters:
+    -----------
+    grid     : dict
+        Values of each parameter in SWEEP_PARAMS (scalar or sequence).
+    band     : (float, float)
+        Frequency band (Hz) the return-loss mask applies to.
+    rl_min_db : float
+        Required return loss over the band (dB), i.e. |Gamma| below
+        10**(-rl_min_db / 20).
+    n_points, n_freqs, c :
+        Profile points, frequencies across the band and profile phase
+        velocity, passed to evaluate_tapers.
+    max_workers : int
+        Processes evaluating blocks of block_size designs (default: CPU count).
+    cache_path : str
+        Optional .npz file the evaluated points are loaded from and saved
+        to, so a refined grid only evaluates its new points.
+
+    Returns:
+    --------
+    results : dict
+        Per-design arrays: the SWEEP_PARAMS, the SWEEP_METRICS,
+        "return_loss_db" and "meets_mask".
+    front   : ndarray
+        Indices of the Pareto-optimal designs (shortest first).
+    best    : int or None
+        Index of the shortest design meeting the mask.
+    """
+    settings = (float(band[0]), float(band[1]), int(n_points), int(n_freqs), float(c))
+    cache = _sweep_cache.setdefault(settings, {})
+    if cache_path is not None:
+        try:
+            with np.load(cache_path) as saved:
+                if tuple(saved["settings"]) == settings:
+                    points, metrics = saved["points"], saved["metrics"]
+                    for values, row in zip(points, metrics):
+                        cache.setdefault(_sweep_key(values), row)
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            pass  # Missing, truncated or corrupt, evaluate below
+
+    axes = [np.atleast_1d(np.asarray(grid[name], dtype=float)) for name in SWEEP_PARAMS]
+    points = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 6)
+    keys = [_sweep_key(values) for values in points]
+
+    todo = np.array([i for i, key in enumerate(keys) if key not in cache], dtype=int)
+    if todo.size:
+        blocks = [todo[i : i + block_size] for i in range(0, todo.size, block_size)]
+        max_workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    evaluate_tapers, points[block], band, n_points, n_freqs, c
+                )
+                for block in blocks
+            ]
+            for block, future in zip(blocks, futures):
+                for i, metrics in zip(block, future.result()):
+                    cache[keys[i]] = metrics
+        if cache_path is not None:
+            # Write to a temporary file first so a crash never leaves a partial cache
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+            np.savez(
+                tmp_path,
+                settings=np.array(settings),
+                points=np.array(list(cache.keys())),
+                metrics=np.array(list(cache.values())),
+            )
+            os.replace(tmp_path, cache_path)
+
+    metrics = np.array([cache[key] for key in keys])
+    results = {name: points[:, k] for k, name in enumerate(SWEEP_PARAMS)}
+    results.update({name: metrics[:, k] for k, name in enumerate(SWEEP_METRICS)})
+    results["return_loss_db"] = -20 * np.log10(results["max_gamma"])
+    results["meets_mask"] = results["return_loss_db"] >= rl_min_db
+
+    front = pareto_front(results["L"], results["max_gamma"])
+    meeting = np.flatnonzero(results["meets_mask"])
+    best = int(meeting[np.argmin(results["L"][meeting])]) if meeting.size else None
+    return results, front, best
+
+
 ##############################################################################
 # 3) MAIN: Compute Taper, then Convert to w(x)
 ##############################################################################
 if __name__ == "__main__":
     # ============= USER PARAMETERS ==========================
-    L = 0.03  # Taper length, meters (3 cm)
-    f_c = 1e8  # Highest frequency = 100 MHz
+    L = 0.3  # Taper length, meters (30 cm)
+    f_c = 1e9  # Cutoff frequency = 1 GHz (lower edge of the passband), A = 2π
     Z1 = 0.1  # Starting impedance (Ohms)
     Z2 = 50.0  # Ending impedance (Ohms)
     c = 3e8  # Propagation speed (m/s), if in air or similar
@@ -109,38 +571,92 @@ if __name__ == "__main__":
     h = 1.0e-3  # Substrate thickness = 1 mm, for example
     eps_r = 4.4  # Dielectric constant, e.g. typical FR-4 ~4.3-4.7
 
+    # Parameter sweep: shortest taper meeting a return-loss mask over a band
+    run_sweep = False
+    # Taper lengths to try (m); 0.1 -> 50 Ohm needs ~2 m for 20 dB from 100 MHz
+    sweep_lengths = np.linspace(0.1, 2.5, 25)
+    sweep_f_c = [5e7, 1e8, 2e8]  # Design frequencies to try (Hz)
+    sweep_band = (1e8, 1e9)  # Band of the return-loss mask (Hz)
+    sweep_rl_min_db = 20.0  # Required return loss (dB)
+    sweep_cache = "taper_sweep_cache.npz"  # Reused by later (refined) sweeps
+
     # 1) Get the Klopfenstein impedance profile
     x_vals, Z_vals = klopfenstein_taper_profile(L, f_c, Z1, Z2, n_points=n_points, v=c)
 
-    # 2) For each Z(x), invert microstrip formula to get w/h => w
-    w_vals = []
-    for Z0 in Z_vals:
-        # If the target Z0 is extremely low (< ~1 ohm),
-        # the standard formula might not be very accurate,
-        # but let's do it anyway for demonstration:
-        u = invert_microstrip_Z0(Z0, eps_r, tol=1e-6)  # w/h
-        w_vals.append(u * h)
+    # 2) Invert the microstrip formula for all Z(x) at once to get w/h => w
+    # If the target Z0 is extremely low (< ~1 ohm),
+    # the standard formula might not be very accurate,
+    # but let's do it anyway for demonstration:
+    # (lookup_microstrip_u gives the same from a cached per-eps_r table,
+    # faster when many tapers share a substrate)
+    w_vals = invert_microstrip_Z0_array(Z_vals, eps_r, tol=1e-6) * h
 
-    w_vals = np.array(w_vals)
+    # 3) Reflection |Gamma(f)| seen from the Z1 port with Z2 at the far end,
+    #    using each section's microstrip phase velocity
+    freqs = np.linspace(1e6, 10 * f_c, 10000)
+    u_sections = 0.5 * (w_vals[1:] + w_vals[:-1]) / h
+    v_sections = microstrip_phase_velocity(u_sections, eps_r, c=c)
+    gamma = taper_reflection(x_vals, Z_vals, freqs, v_sections, Z_source=Z1, Z_load=Z2)
+    # Passband floor Gamma_m = Gamma_0 / cosh(A) of the profile's design
+    gamma_m = np.tanh(abs(0.5 * np.log(Z2 / Z1)) / np.cosh(2 * np.pi * f_c * L / c))
 
-    # 3) Output or plot: (x_vals, w_vals)
+    # 4) Output or plot: (x_vals, w_vals) and |Gamma(f)|
     #    We'll do a quick plot in Matplotlib, with x in mm, w in mm
     import matplotlib.pyplot as plt
 
-    fig, ax = plt.subplots(figsize=(6, 4))
+    fig, (ax, ax_gamma) = plt.subplots(1, 2, figsize=(12, 4))
     ax.plot(x_vals * 1000, w_vals * 1000, "b-o", label="Width profile")
     ax.set_xlabel("x (mm)")
     ax.set_ylabel("width w(x) (mm)")
-    ax.set_title("Klopfenstein Taper Geometry\nfrom Z=%.3f Ω to Z=%.1f Ω" % (Z1, Z2))
+    ax.set_title(
+        "Klopfenstein Taper Geometry (L=%g mm, f_c=%g MHz)\nfrom Z=%.3f Ω to Z=%.1f Ω"
+        % (L * 1000, f_c / 1e6, Z1, Z2)
+    )
     # ax.set_aspect("equal", adjustable="box")
     ax.grid(True)
     ax.legend()
+
+    ax_gamma.plot(freqs / 1e6, np.abs(gamma), "r-")
+    ax_gamma.axvline(f_c / 1e6, color="k", linestyle="--", label="f_c")
+    ax_gamma.axhline(gamma_m, color="g", linestyle=":", label="Γm (design)")
+    ax_gamma.set_xlabel("f (MHz)")
+    ax_gamma.set_ylabel("|Γ(f)|")
+    ax_gamma.set_title("Reflection at the Z=%.3f Ω port" % Z1)
+    ax_gamma.grid(True)
+    ax_gamma.legend()
     plt.show()
 
-    # 4) If needed, write out x,y to a CSV for CAD
+    # 5) If needed, write out x,y to a CSV for CAD
     # with open("taper_xy.csv","w") as f:
     #     f.write("x_mm,w_mm\n")
     #     for xx,ww in zip(x_vals, w_vals):
     #         f.write(f"{xx*1000:.6e},{ww*1000:.6e}\n")
 
     print("Done. If needed, see 'taper_xy.csv' for the x,y data.")
+
+    # 6) Optional parameter sweep over length and design frequency
+    if run_sweep:
+        grid = {"L": sweep_lengths, "f_c": sweep_f_c, "Z1": Z1, "Z2": Z2}
+        grid.update({"eps_r": eps_r, "h": h})
+        results, front, best = sweep_tapers(
+            grid,
+            sweep_band,
+            rl_min_db=sweep_rl_min_db,
+            c=c,
+            cache_path=sweep_cache,
+        )
+        print("Pareto front (length vs worst in-band return loss):")
+        for i in front:
+            print(
+                f"  L = {results['L'][i] * 1000:7.2f} mm"
+                f"  f_c = {results['f_c'][i]:.3g} Hz"
+                f"  RL = {results['return_loss_db'][i]:6.2f} dB"
+            )
+        if best is None:
+            print(f"No design meets {sweep_rl_min_db} dB over the band")
+        else:
+            print(
+                f"Shortest design meeting {sweep_rl_min_db} dB: "
+                f"L = {results['L'][best] * 1000:.2f} mm, "
+                f"f_c = {results['f_c'][best]:.3g} Hz"
+            )
@@ -1,5 +1,22 @@
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy.special import i1e
+
+
+def klopfenstein_phi(z, A, n_nodes=64):
+    """
+    Klopfenstein's phi(z, A) = integral from 0 to z of
+    I1(A sqrt(1 - y^2)) / (A sqrt(1 - y^2)) dy for |z| <= 1, times exp(-A)
+    so it stays finite for large A (Gauss-Legendre quadrature on [0, z]).
+    """
+    s, w = np.polynomial.legendre.leggauss(n_nodes)
+    s, w = (s + 1) / 2, w / 2  # Nodes and weights on [0, 1]
+    z = np.asarray(z, dtype=float)[..., None]
+    t = A * np.sqrt(1 - (z * s) ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # I1(t) / t -> 1/2 as t -> 0
+        f = np.where(t > 0, i1e(t) / t, 0.5) * np.exp(t - A)
+    return z[..., 0] * np.sum(w * f, axis=-1)
 
 
 def klopfenstein_taper_profile(L, f_c, Z1, Z2, n_points=200, v=3e8):
@@ -7,39 +24,43 @@ def klopfenstein_taper_profile(L, f_c, Z1, Z2, n_points=200, v=3e8):
     Compute the Klopfenstein impedance profile Z(x) from x=0..L
     given:
         L      = total length of taper (meters)
-        f_c    = highest design freq (Hz)
+        f_c    = cutoff frequency (Hz), lower edge of the passband
         Z1, Z2 = end impedances (Ohms) at x=0, x=L
         v      = phase velocity (m/s)
     Returns arrays x[], Zx[] of length n_points.
+
+    ln Z(x) = ln(Z1 Z2) / 2 + Gamma_0 / cosh(A) * A^2 * phi(2x/L - 1, A),
+    with Gamma_0 = ln(Z2 / Z1) / 2 and A = 2 pi f_c L / v. Above f_c the
+    reflection stays near Gamma_m = Gamma_0 / cosh(A); the profile keeps
+    steps of that size to Z1 and Z2 at its ends.
     """
-    # Intrinsic reflection coefficient
-    gamma_0 = (Z2 - Z1) / (Z2 + Z1)  # can be near 1 if Z1 << Z2
+    # Intrinsic reflection coefficient (log form, valid for large ratios)
+    gamma_0 = 0.5 * np.log(Z2 / Z1)
 
     # Phase constant at f_c
     beta_c = 2 * np.pi * f_c / v
 
-    # Klopfenstein parameter B
-    B = L * beta_c  # typically L * (2πf_c/v)
-
-    # Reflection plateau
-    gamma_m = gamma_0 / np.cosh(B)  # for small B, gamma_m ~ gamma_0
+    # Klopfenstein parameter A
+    A = L * beta_c  # typically L * (2πf_c/v)
 
     # Discretize x from 0 to L
     x_arr = np.linspace(0, L, n_points)
 
-    # Compute gamma(x)
-    gamma_x = gamma_m * np.cosh(B * (L / 2 - x_arr)) / np.cosh(B * L / 2)
+    # Compute ln Z(x), phi carried as phi * exp(-A)
+    z = 2 * x_arr / L - 1 if L > 0 else np.zeros(n_points)
+    scale = gamma_0 * A**2 * 2 / (1 + np.exp(-2 * A))  # A^2 / cosh(A) * exp(A)
+    log_Z = 0.5 * np.log(Z1 * Z2) + scale * klopfenstein_phi(z, A)
 
     # Compute Z(x)
-    Zx = Z1 * np.sqrt((1 + gamma_x) / (1 - gamma_x))
+    Zx = np.exp(log_Z)
 
     return x_arr, Zx
 
 
 if __name__ == "__main__":
     # Parameters
-    L = 0.03  # 3 cm
-    f_c = 1e8  # 100 MHz
+    L = 0.3  # 30 cm
+    f_c = 1e9  # 1 GHz cutoff, A = 2π
     Z1 = 0.1  # extremely low impedance
     Z2 = 50.0  # standard 50 ohms
     c = 3e8  # speed of light in vacuum (m/s)
@@ -49,8 +70,11 @@ if __name__ == "__main__":
 
     # Plot the profile
     plt.figure(figsize=(6, 4))
-    plt.plot(1000 * x_vals, Z_vals, "b-")
-    plt.title("3 cm Klopfenstein Taper from 0.1 Ω to 50 Ω (f_c=100 MHz)")
+    plt.semilogy(1000 * x_vals, Z_vals, "b-")
+    plt.title(
+        f"{L * 100:g} cm Klopfenstein Taper from {Z1:g} Ω to {Z2:g} Ω"
+        f" (f_c={f_c / 1e6:g} MHz)"
+    )
     plt.xlabel("x (mm)")
     plt.ylabel("Z(x) (Ω)")
     plt.grid(True)
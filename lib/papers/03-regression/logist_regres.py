@@ -1,8 +1,9 @@
-from typing import Tuple
+import itertools
+from typing import Callable, Iterable, Iterator, Sequence, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
-from numpy.typing import NDArray
+from numpy.typing import ArrayLike, NDArray
 
 
 def logist(
@@ -29,11 +30,19 @@ def logist(
 
 
 def s_wire(
-    J: NDArray[np.floating], N_cycl: int = 1, J0: float = 1, a: float = 1
+    J: NDArray[np.floating],
+    N_cycl: int = 1,
+    J0: float = 1,
+    a: float = 1,
+    rng: np.random.Generator | None = None,
 ) -> NDArray[np.floating]:
     """
     S-wire simulation
 
+    Each element is the fraction of ones over N_cycl Bernoulli cycles with
+    p = (tanh(a(J - J0)/2) + 1)/2; the number of ones is drawn directly as
+    Binomial(N_cycl, p) for the whole array at once.
+
     Parameters
     ----------
     J : array-like
@@ -44,20 +53,17 @@ def s_wire(
         Threshold current or decision boundary parameter for the sigmoid function
     a : float, optional
         Scale factor. Default is 1.
+    rng : np.random.Generator, optional
+        Random number generator. Default is the global NumPy random state.
 
     Returns
     -------
     array-like
         Simulation results
     """
-    s = np.zeros_like(J)
-    for Ji, Jt in enumerate(J.flat):
-        p = (np.tanh(a * (Jt - J0) / 2) + 1) / 2
-        s.flat[Ji] = (
-            np.sum(np.random.choice([0, 1], size=N_cycl, replace=True, p=[1 - p, p]))
-            / N_cycl
-        )
-    return s
+    p = (np.tanh(a * (np.asarray(J) - J0) / 2) + 1) / 2
+    binomial = np.random.binomial if rng is None else rng.binomial
+    return binomial(N_cycl, p) / N_cycl
 
 
 def sigmoid(
@@ -66,6 +72,7 @@ def sigmoid(
     N_cycl: int = 1,
     J0: float = 1,
     a: float = 1,
+    rng: np.random.Generator | None = None,
 ) -> NDArray[np.floating] | float:
     """
     Returns sigmoid value depending on current J in two modes:
@@ -84,6 +91,9 @@ def sigmoid(
         Threshold current or decision boundary parameter for the sigmoid function
     a : float, optional
         Scale factor. Default is 1.
+    rng : np.random.Generator, optional
+        Random number generator for the simulation mode. Default is the
+        global NumPy random state.
 
     Returns
     -------
@@ -91,7 +101,7 @@ def sigmoid(
         Sigmoid value
     """
     if sim:
-        s = s_wire(J, N_cycl=N_cycl, J0=J0, a=a)  # pyright: ignore
+        s = s_wire(J, N_cycl=N_cycl, J0=J0, a=a, rng=rng)  # pyright: ignore
     else:
         s = logist(J, J0=J0, a=a)
     return s
@@ -121,16 +131,364 @@ def gen_data(
     y : np.array of int (0 and 1)
         Class labels
     """
-    x = (2 * np.random.rand(n_samples, 2) - 1) * xm
-    y = np.array(
-        [1 if (xj * np.cos(phi) + xi * np.sin(phi)) > 0 else 0 for xi, xj in x]
-    ).astype(int)
-    dx = (2 * np.random.rand(n_samples) - 1) * xm * xcross
-    x[:, 0] = (x[:, 0] + dx * np.cos(phi)) / (1 + xcross * np.abs(np.cos(phi)))
-    x[:, 1] = (x[:, 1] + dx * np.sin(phi)) / (1 + xcross * np.abs(np.sin(phi)))
+    return gen_data_nd(
+        n_samples,
+        normal=(np.sin(phi), np.cos(phi)),
+        xm=xm,
+        xcross=xcross,
+        direction=(np.cos(phi), np.sin(phi)),
+    )
+
+
+def gen_data_nd(
+    n_samples: int = 250,
+    normal: ArrayLike = (np.sin(np.pi / 6), np.cos(np.pi / 6)),
+    offset: float = 0,
+    xm: float = 1,
+    xcross: float = 0.5,
+    direction: ArrayLike | None = None,
+    rng: np.random.Generator | None = None,
+) -> Tuple[NDArray[np.floating], NDArray[np.integer]]:
+    """
+    Function creates a set of d-dimensional data split into two classes by
+    the hyperplane x . normal = offset
+
+    Points are uniform in the cube [-xm, xm]^d. Each is then shifted along
+    direction by a random amount up to xm * xcross, which mixes the classes
+    near the hyperplane, and rescaled per axis to stay within the cube.
+
+    Parameters
+    ----------
+    n_samples : int, optional
+        Number of points. Default is 250.
+    normal : array-like of shape (d,), optional
+        Normal of the separating hyperplane; its length sets d. Default is
+        the 2-D gen_data line at phi = np.pi/6.
+    offset : float, optional
+        Offset of the hyperplane from the origin along normal. Default is 0.
+    xm : float, optional
+        Amplitude. Default is 1.
+    xcross : float, optional
+        Depth of class mixing near the hyperplane. Default is 0.5.
+    direction : array-like of shape (d,), optional
+        Direction of the mixing shift. Default is the unit normal.
+    rng : np.random.Generator, optional
+        Random number generator. Default is the global NumPy random state.
+
+    Returns
+    -------
+    x : np.array of shape (n_samples, d)
+        Point locations
+    y : np.array of int (0 and 1)
+        Class labels
+    """
+    normal = np.asarray(normal, dtype=float)
+    if direction is None:
+        direction = normal / np.linalg.norm(normal)
+    direction = np.asarray(direction, dtype=float)
+    uniform = np.random.random_sample if rng is None else rng.random
+
+    x = (2 * uniform((n_samples, len(normal))) - 1) * xm
+    y = (np.sum(x * normal, axis=1) > offset).astype(int)
+    dx = (2 * uniform(n_samples) - 1) * xm * xcross
+    x = (x + dx[:, np.newaxis] * direction) / (1 + xcross * np.abs(direction))
     return x, y
 
 
+def iter_gen_data(
+    n_samples: int,
+    chunk_size: int = 1_000_000,
+    seed: int = 0,
+    **kwargs,
+) -> Iterator[Tuple[NDArray[np.floating], NDArray[np.integer]]]:
+    """
+    gen_data_nd points in chunks, generated on the fly
+
+    Chunk k is drawn from np.random.default_rng([seed, k]), so the data set
+    is fully determined by (seed, chunk_size) and any chunk can be
+    regenerated, or generated in another process, without the ones before
+    it. Only one chunk is held in memory at a time.
+
+    Parameters
+    ----------
+    n_samples : int
+        Total number of points
+    chunk_size : int, optional
+        Points per chunk (the last one may be smaller). Default is 1_000_000.
+    seed : int, optional
+        Seed of the data set. Default is 0.
+    **kwargs
+        Hyperplane and mixing parameters passed to gen_data_nd
+
+    Yields
+    ------
+    x, y : np.array
+        One chunk of points and labels
+    """
+    for k, start in enumerate(range(0, n_samples, chunk_size)):
+        rng = np.random.default_rng([seed, k])
+        yield gen_data_nd(min(chunk_size, n_samples - start), rng=rng, **kwargs)
+
+
+def log_loss(
+    x: NDArray[np.floating],
+    y: NDArray[np.integer],
+    w: NDArray[np.floating],
+    xm: float = 1,
+    J0: float = 1,
+    a: float = 1,
+) -> NDArray[np.floating]:
+    """
+    Cross-entropy of the ideal (logistic) classifier for weights w
+
+    Parameters
+    ----------
+    x : np.array of shape (n, d)
+        Point locations
+    y : np.array of int (0 and 1)
+        Class labels
+    w : np.array of shape (..., d)
+        Weights; any leading dimensions are kept
+    xm : float, optional
+        Amplitude the currents are normalized by. Default is 1.
+    J0 : float, optional
+        Threshold current or decision boundary parameter for the sigmoid function
+    a : float, optional
+        Scale factor. Default is 1.
+
+    Returns
+    -------
+    np.array of shape w.shape[:-1]
+        Mean cross-entropy over the points
+    """
+    s = logist(np.einsum("nd,...d->...n", x, w) / xm + J0, J0=J0, a=a)
+    return _cross_entropy(y, s)  # pyright: ignore
+
+
+def _cross_entropy(
+    y: NDArray[np.integer], s: NDArray[np.floating]
+) -> NDArray[np.floating]:
+    """Mean cross-entropy of probabilities s (..., n) against labels y (n,)"""
+    eps = 1e-12
+    s = np.clip(s, eps, 1 - eps)
+    return -np.mean(y * np.log(s) + (1 - y) * np.log(1 - s), axis=-1)
+
+
+def train_batched(
+    x: NDArray[np.floating],
+    y: NDArray[np.integer],
+    N: int = 250,
+    N_cycl: Sequence[int] = (1,),
+    alpha: Sequence[float] = (0.02,),
+    seeds: Sequence[int | None] = (0,),
+    sim: bool = True,
+    xm: float = 1,
+    J0: float = 1,
+    a: float = 1,
+    rng: np.random.Generator | None = None,
+) -> Tuple[NDArray[np.floating], NDArray[np.floating], dict]:
+    """
+    Gradient descent for every combination of N_cycl, learning rate and
+    seed at once, as R stacked trajectories
+
+    All R = len(N_cycl) * len(alpha) * len(seeds) trajectories advance
+    together: each step evaluates the currents of every trajectory as one
+    (R, n) array and draws all s-wire outputs in a single binomial call.
+    The seed of a trajectory sets its random initial weights; the s-wire
+    noise comes from rng, shared by the whole grid.
+
+    Parameters
+    ----------
+    x : np.array of shape (n, d)
+        Point locations
+    y : np.array of int (0 and 1)
+        Class labels
+    N : int, optional
+        Number of iterations in gradient descent. Default is 250.
+    N_cycl : sequence of int, optional
+        Numbers of cycles in simulation mode. Default is (1,).
+    alpha : sequence of float, optional
+        Learning rates. Default is (0.02,).
+    seeds : sequence of int or None, optional
+        Seeds of the initial weights. Default is (0,).
+    sim : bool, optional
+        Use the s-wire simulation (True) or the ideal logistic function.
+        Default is True.
+    xm : float, optional
+        Amplitude the currents are normalized by. Default is 1.
+    J0 : float, optional
+        Threshold current or decision boundary parameter for the sigmoid function
+    a : float, optional
+        Scale factor. Default is 1.
+    rng : np.random.Generator, optional
+        Random number generator for the s-wire noise. Default is a new
+        unseeded generator.
+
+    Returns
+    -------
+    w : np.array of shape (R, N+1, d)
+        Weight history of each trajectory
+    loss : np.array of shape (R, N+1)
+        Cross-entropy (see log_loss) of each trajectory's weights
+    grid : dict
+        "N_cycl", "alpha" and "seed" of each trajectory, as length-R arrays
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    combos = list(itertools.product(N_cycl, alpha, seeds))
+    grid = {
+        "N_cycl": np.array([c[0] for c in combos]),
+        "alpha": np.array([c[1] for c in combos]),
+        "seed": np.array([c[2] for c in combos], dtype=object),
+    }
+    n_cycl = grid["N_cycl"][:, np.newaxis]
+    lr = grid["alpha"][:, np.newaxis]
+
+    R, d = len(combos), x.shape[1]
+    w = np.zeros((R, N + 1, d))
+    loss = np.zeros((R, N + 1))
+    # Choose random initial weights
+    w[:, 0] = [np.random.default_rng(seed).random(d) for seed in grid["seed"]]
+
+    for i in range(N + 1):
+        J = x @ w[:, i].T / xm + J0  # (n, R) currents
+        # Loss of the current weights from the same currents, so no
+        # (R, N+1, n) array is ever built
+        loss[:, i] = _cross_entropy(y, logist(J.T, J0=J0, a=a))  # pyright: ignore
+        if i == N:
+            break
+        if sim:
+            s = s_wire(J.T, N_cycl=n_cycl, J0=J0, a=a, rng=rng)  # pyright: ignore
+        else:
+            s = logist(J.T, J0=J0, a=a)
+        gradL = -(y - s) @ x  # pyright: ignore
+        w[:, i + 1] = w[:, i] - lr * gradL
+
+    return w, loss, grid
+
+
+def iter_batches(
+    x: NDArray[np.floating],
+    y: NDArray[np.integer],
+    batch_size: int = 256,
+    shuffle: bool = False,
+    rng: np.random.Generator | None = None,
+) -> Iterator[Tuple[NDArray[np.floating], NDArray[np.integer]]]:
+    """
+    Consecutive mini-batches of a dataset
+
+    Batches are contiguous slices, so x and y can be memory-mapped arrays
+    (e.g. np.load(..., mmap_mode="r")) that are only read one batch at a
+    time. Shuffling permutes the order of the batches, not the points,
+    which keeps every read contiguous.
+
+    Parameters
+    ----------
+    x : np.array of shape (n, d)
+        Point locations
+    y : np.array of int (0 and 1)
+        Class labels
+    batch_size : int, optional
+        Number of points per batch (the last one may be smaller). Default is 256.
+    shuffle : bool, optional
+        Visit the batches in random order. Default is False.
+    rng : np.random.Generator, optional
+        Random number generator for the shuffling
+
+    Yields
+    ------
+    x, y : np.array
+        One batch of points and labels
+    """
+    starts = np.arange(0, len(x), batch_size)
+    if shuffle:
+        starts = (np.random.default_rng() if rng is None else rng).permutation(starts)
+    for start in starts:
+        yield np.asarray(x[start : start + batch_size]), np.asarray(
+            y[start : start + batch_size]
+        )
+
+
+def train_sgd(
+    data: Tuple[NDArray[np.floating], NDArray[np.integer]]
+    | Callable[[], Iterable[Tuple[NDArray[np.floating], NDArray[np.integer]]]],
+    batch_size: int = 256,
+    epochs: int = 1,
+    alpha: float = 5.0,
+    sim: bool = True,
+    N_cycl: int = 1,
+    xm: float = 1,
+    J0: float = 1,
+    a: float = 1,
+    w0: NDArray[np.floating] | None = None,
+    shuffle: bool = False,
+    rng: np.random.Generator | None = None,
+) -> NDArray[np.floating]:
+    """
+    Mini-batch (stochastic) gradient descent with the s-wire sigmoid
+
+    Each batch takes one step of the same update as the full-batch descent,
+    with the gradient averaged over the batch, so the step size does not
+    depend on the batch size; a single batch holding all n points with
+    learning rate alpha * n reproduces the full-batch descent. Only one
+    batch (or one streamed chunk) is in memory at a time.
+
+    Parameters
+    ----------
+    data : (x, y) tuple or callable
+        Either the dataset as arrays (possibly memory-mapped), or a callable
+        returning a fresh iterable of (x, y) chunks for each epoch, such as
+        iter_gen_data. Both are split into batches with iter_batches.
+    batch_size : int, optional
+        Number of points per batch. Default is 256.
+    epochs : int, optional
+        Number of passes over the data. Default is 1.
+    alpha : float, optional
+        Learning rate for the batch-mean gradient. Default is 5.0.
+    sim : bool, optional
+        Use the s-wire simulation (True) or the ideal logistic function.
+        Default is True.
+    N_cycl : int, optional
+        Number of cycles in simulation mode. Default is 1.
+    xm : float, optional
+        Amplitude the currents are normalized by. Default is 1.
+    J0 : float, optional
+        Threshold current or decision boundary parameter for the sigmoid function
+    a : float, optional
+        Scale factor. Default is 1.
+    w0 : np.array of shape (d,), optional
+        Initial weights. Default is random in [0, 1).
+    shuffle : bool, optional
+        Shuffle the batch order each epoch (within each chunk for a
+        callable). Default is False.
+    rng : np.random.Generator, optional
+        Random number generator for the initial weights, shuffling and s-wire noise
+
+    Returns
+    -------
+    w : np.array of shape (steps+1, d)
+        Weights after each step
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    chunks = data if callable(data) else lambda: [data]
+
+    def batch_source():
+        for x, y in chunks():
+            yield from iter_batches(x, y, batch_size, shuffle, rng)
+
+    w = [] if w0 is None else [np.asarray(w0, dtype=float)]
+    for _ in range(epochs):
+        for xb, yb in batch_source():
+            if not w:
+                # Choose random initial weights
+                w.append(rng.random(xb.shape[1]))
+            s = sigmoid(
+                xb @ w[-1] / xm + J0, sim=sim, N_cycl=N_cycl, J0=J0, a=a, rng=rng
+            )
+            gradL = -(yb - s) @ xb / len(xb)  # pyright: ignore
+            w.append(w[-1] - alpha * gradL)
+    return np.array(w)
+
+
 if __name__ == "__main__":
     # Generate training data
     n_samples = 400
@@ -147,18 +505,24 @@ if __name__ == "__main__":
 
     # Gradient descent
     N = 250  # Number of iterations in gradient descent
-    w = np.zeros((N + 1, 2))  # Weight array
-    w0 = 0.5  # Initial weight
-    w[0] = np.full(shape=2, fill_value=w0)
-    w[0] = np.random.rand(2)  # Choose random initial weights
     alpha = 0.02  # Learning rate
+    seed = None  # Seed of the random initial weights
 
-    for i in range(N):
-        s = sigmoid(np.sum(x * w[i], axis=1) / xm + J0, sim=sim, N_cycl=N_cycl, J0=J0)
-        gradL = -np.sum(
-            x * (y[:, np.newaxis] - s[:, np.newaxis]), axis=0  # pyright: ignore
-        )
-        w[i + 1] = w[i] - alpha * gradL
+    # A single trajectory; pass several N_cycl / alpha / seeds values to
+    # train_batched to compare them in one run
+    w, loss, _ = train_batched(
+        x,
+        y,
+        N=N,
+        N_cycl=(N_cycl,),
+        alpha=(alpha,),
+        seeds=(seed,),
+        sim=sim,
+        xm=xm,
+        J0=J0,
+        a=a,
+    )
+    w = w[0]  # Weight array
 
     # Results presentation
     plt.figure(figsize=(12, 4))
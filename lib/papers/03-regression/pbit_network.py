@@ -0,0 +1,234 @@
+import time
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import ArrayLike, NDArray
+
+
+def coupling_matrix(J: ArrayLike | sp.spmatrix) -> sp.csr_matrix:
+    """
+    Symmetric CSR coupling matrix with an empty diagonal
+
+    Parameters
+    ----------
+    J : array-like or sparse matrix of shape (n, n)
+        Couplings J_ij. Only the upper triangle (i < j) is used and mirrored,
+        matching the energy sum over i < j.
+
+    Returns
+    -------
+    sp.csr_matrix
+        Symmetric float32 couplings
+    """
+    upper = sp.triu(sp.csr_matrix(J), k=1)
+    J = (upper + upper.T).tocsr().astype(np.float32)
+    J.eliminate_zeros()
+    return J
+
+
+def greedy_coloring(J: sp.csr_matrix) -> NDArray[np.integer]:
+    """
+    Greedy graph coloring of the coupling graph, largest degree first
+
+    Spins of one color share no coupling, so they can all be updated at
+    once without changing each other's input currents.
+
+    Parameters
+    ----------
+    J : sp.csr_matrix of shape (n, n)
+        Symmetric couplings
+
+    Returns
+    -------
+    np.array of int of shape (n,)
+        Color of each spin, numbered from 0
+    """
+    n = J.shape[0]
+    indptr, indices = J.indptr, J.indices
+    colors = np.full(n, -1)
+    for i in np.argsort(-np.diff(indptr), kind="stable"):
+        used = set(colors[indices[indptr[i] : indptr[i + 1]]].tolist())
+        color = 0
+        while color in used:
+            color += 1
+        colors[i] = color
+    return colors
+
+
+def linear_schedule(beta0: float, beta1: float, n_sweeps: int) -> NDArray[np.floating]:
+    """Inverse temperature rising linearly from beta0 to beta1 over n_sweeps"""
+    return np.linspace(beta0, beta1, n_sweeps)
+
+
+def geometric_schedule(
+    beta0: float, beta1: float, n_sweeps: int
+) -> NDArray[np.floating]:
+    """Inverse temperature rising geometrically from beta0 to beta1 over n_sweeps"""
+    return np.geomspace(beta0, beta1, n_sweeps)
+
+
+class PBitNetwork:
+    """
+    Network of p-bits with energy E = -sum_{i<j} J_ij m_i m_j - sum_i h_i m_i
+
+    Each p-bit follows the SBN rule m_i = sign(tanh(beta I_i) - r) with
+    input current I_i = sum_j J_ij m_j + h_i and r uniform in [-1, 1], so
+    P(m_i = +1) = (1 + tanh(beta I_i)) / 2: the s-wire sigmoid with one
+    cycle. A sweep updates the spins one color class at a time (Gibbs
+    sampling with graph-colored parallel updates), each class in one
+    sparse product. States hold R independent replicas as columns of an
+    (n, R) array.
+    """
+
+    def __init__(self, J: ArrayLike | sp.spmatrix, h: ArrayLike | None = None):
+        self.J = coupling_matrix(J)
+        self.n = self.J.shape[0]
+        self.h = np.zeros(self.n, dtype=np.float32)
+        if h is not None:
+            self.h[:] = h
+        self.colors = greedy_coloring(self.J)
+        self.n_colors = int(self.colors.max()) + 1 if self.n else 0
+
+        # Rows of J and h for each color class
+        self.classes: List[NDArray[np.integer]] = [
+            np.flatnonzero(self.colors == c) for c in range(self.n_colors)
+        ]
+        self.class_J = [self.J[idx] for idx in self.classes]
+        self.class_h = [self.h[idx, np.newaxis] for idx in self.classes]
+
+    def random_state(
+        self, n_replicas: int = 1, rng: np.random.Generator | None = None
+    ) -> NDArray[np.floating]:
+        """Uniformly random spins of shape (n, n_replicas)"""
+        rng = np.random.default_rng() if rng is None else rng
+        m = rng.integers(0, 2, size=(self.n, n_replicas)) * 2 - 1
+        return m.astype(np.float32)
+
+    def energy(self, m: NDArray[np.floating]) -> NDArray[np.floating]:
+        """Energy of each replica (column) of m"""
+        m = np.asarray(m, dtype=np.float64).reshape(self.n, -1)
+        return -0.5 * np.sum(m * (self.J @ m), axis=0) - self.h @ m
+
+    def sweep(
+        self, m: NDArray[np.floating], beta: float, rng: np.random.Generator
+    ) -> NDArray[np.floating]:
+        """Update every spin of m (n, R) once in place at inverse temperature beta"""
+        for idx, J_c, h_c in zip(self.classes, self.class_J, self.class_h):
+            current = J_c @ m + h_c
+            r = rng.random(current.shape, dtype=np.float32) * 2 - 1
+            m[idx] = np.where(np.tanh(beta * current) > r, 1, -1)
+        return m
+
+    def anneal(
+        self,
+        betas: Iterable[float],
+        n_replicas: int = 1,
+        m0: NDArray[np.floating] | None = None,
+        rng: np.random.Generator | None = None,
+        record_every: int = 1,
+    ) -> Tuple[
+        NDArray[np.floating], NDArray[np.floating], NDArray[np.floating], float
+    ]:
+        """
+        Run one sweep per beta of the schedule on all replicas
+
+        Parameters
+        ----------
+        betas : iterable of float
+            Inverse temperature of each sweep, e.g. from linear_schedule
+        n_replicas : int, optional
+            Number of independent replicas when m0 is not given. Default is 1.
+        m0 : np.array of shape (n, R), optional
+            Initial spins (copied). Default is random.
+        rng : np.random.Generator, optional
+            Random number generator
+        record_every : int, optional
+            Sweeps between recorded energies. Default is 1.
+
+        Returns
+        -------
+        best_m : np.array of shape (n, R)
+            Lowest-energy state seen by each replica (at the recorded sweeps)
+        best_energy : np.array of shape (R,)
+            Energy of best_m
+        energies : np.array of shape (n_recorded, R)
+            Energy of each replica at the recorded sweeps
+        sweeps_per_sec : float
+            Sweep rate (over all replicas together)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        if m0 is None:
+            m = self.random_state(n_replicas, rng)
+        else:
+            m = np.array(m0, dtype=np.float32).reshape(self.n, -1)
+        best_m = m.copy()
+        best_energy = self.energy(m)
+
+        energies = []
+        n_sweeps = 0
+        start = time.perf_counter()
+        for n_sweeps, beta in enumerate(betas, start=1):
+            self.sweep(m, beta, rng)
+            if n_sweeps % record_every == 0:
+                energy = self.energy(m)
+                better = energy < best_energy
+                best_m[:, better] = m[:, better]
+                best_energy[better] = energy[better]
+                energies.append(energy)
+        seconds = time.perf_counter() - start
+
+        energies = np.array(energies).reshape(-1, m.shape[1])
+        return best_m, best_energy, energies, n_sweeps / max(seconds, 1e-12)
+
+
+def lattice_couplings(L: int, rng: np.random.Generator | None = None) -> sp.csr_matrix:
+    """
+    +/-1 spin-glass couplings on a periodic L x L square lattice
+
+    Parameters
+    ----------
+    L : int
+        Lattice side; the network has L**2 spins
+    rng : np.random.Generator, optional
+        Random number generator for the coupling signs
+
+    Returns
+    -------
+    sp.csr_matrix
+        Upper-triangular couplings (see coupling_matrix)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    site = np.arange(L * L).reshape(L, L)
+    i = np.concatenate([site.ravel(), site.ravel()])
+    j = np.concatenate(
+        [np.roll(site, -1, axis=0).ravel(), np.roll(site, -1, axis=1).ravel()]
+    )
+    signs = rng.choice([-1.0, 1.0], size=len(i))
+    lower, upper = np.minimum(i, j), np.maximum(i, j)
+    return sp.csr_matrix((signs, (lower, upper)), shape=(L * L, L * L))
+
+
+if __name__ == "__main__":
+    # Spin-glass instance
+    L = 316  # Lattice side, ~10^5 spins
+    seed = 0
+    rng = np.random.default_rng(seed)
+    network = PBitNetwork(lattice_couplings(L, rng))
+    print(
+        f"{network.n} spins, {network.J.nnz // 2} couplings, {network.n_colors} colors"
+    )
+
+    # Annealing
+    n_sweeps = 1000
+    n_replicas = 4
+    betas = linear_schedule(0.1, 3.0, n_sweeps)
+    best_m, best_energy, energies, sweeps_per_sec = network.anneal(
+        betas, n_replicas=n_replicas, rng=rng, record_every=10
+    )
+
+    print(
+        f"{sweeps_per_sec:.1f} sweeps/s of {n_replicas} replicas "
+        f"({sweeps_per_sec * network.n * n_replicas:.3g} spin updates/s)"
+    )
+    print(f"Best energy per spin: {best_energy.min() / network.n:.4f}")
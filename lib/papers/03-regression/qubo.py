@@ -0,0 +1,247 @@
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import ArrayLike, NDArray
+
+from pbit_network import PBitNetwork, coupling_matrix, linear_schedule
+
+MODES = ("sbn", "sb")
+
+# A schedule is either the per-step values themselves or a function of the
+# number of steps returning them
+Schedule = ArrayLike | Callable[[int], ArrayLike]
+
+
+def qubo_to_ising(
+    Q: ArrayLike | sp.spmatrix,
+) -> Tuple[sp.csr_matrix, NDArray[np.floating], float]:
+    """
+    Ising form of the QUBO x^T Q x, x_i in {0, 1}, through x = (1 + m) / 2
+
+    Parameters
+    ----------
+    Q : array-like or sparse matrix of shape (n, n)
+        QUBO matrix; it need not be symmetric
+
+    Returns
+    -------
+    J : sp.csr_matrix
+        Symmetric couplings of the Ising energy -sum_{i<j} J_ij m_i m_j - sum_i h_i m_i
+    h : np.array of shape (n,)
+        Local fields
+    offset : float
+        Constant such that x^T Q x = E(m) + offset
+    """
+    Q = sp.csr_matrix(Q, dtype=np.float64)
+    diag = Q.diagonal()
+    off = (Q + Q.T) / 2
+    off.setdiag(0)
+    off.eliminate_zeros()
+    row_sums = np.asarray(off.sum(axis=1)).ravel()
+
+    J = coupling_matrix(-off / 2)
+    h = -(diag + row_sums) / 2
+    offset = diag.sum() / 2 + off.sum() / 4
+    return J, h, float(offset)
+
+
+def qubo_value(Q: ArrayLike | sp.spmatrix, x: ArrayLike) -> NDArray[np.floating]:
+    """Objective x^T Q x of each column of x (n, R), or of a single x (n,)"""
+    Q = sp.csr_matrix(Q, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    return np.sum(x * (Q @ x), axis=0)
+
+
+def _field_scale(J: sp.csr_matrix, h: NDArray[np.floating]) -> float:
+    """RMS size of the input current of a spin, sqrt(mean_i(sum_j J_ij^2 + h_i^2))"""
+    squares = np.asarray(J.multiply(J).sum(axis=1)).ravel() + h**2
+    return float(np.sqrt(np.mean(squares))) or 1.0
+
+
+def _resolve_schedule(schedule: Schedule, n_steps: int) -> NDArray[np.floating]:
+    """Per-step values of a schedule given as values or as a function of n_steps"""
+    values = schedule(n_steps) if callable(schedule) else schedule
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) != n_steps:
+        raise ValueError(f"Schedule has {len(values)} steps, expected {n_steps}")
+    return values
+
+
+def simulated_bifurcation(
+    J: sp.csr_matrix,
+    h: NDArray[np.floating],
+    pumping: NDArray[np.floating],
+    n_replicas: int = 1,
+    dt: float = 0.5,
+    rng: np.random.Generator | None = None,
+) -> NDArray[np.floating]:
+    """
+    Ballistic simulated bifurcation of the Ising energy with couplings J
+    and fields h
+
+    Each replica is a set of oscillators with positions x and momenta y,
+    integrated with symplectic Euler steps:
+
+        y += dt * (-(a0 - a(t)) x + c0 (J x + h)),  x += dt * a0 * y
+
+    with a0 = 1, the pumping a(t) taken from the schedule (rising from 0 to
+    1), and inelastic walls at |x| = 1. The spins are the signs of x.
+
+    Parameters
+    ----------
+    J : sp.csr_matrix of shape (n, n)
+        Symmetric couplings
+    h : np.array of shape (n,)
+        Local fields
+    pumping : np.array
+        Pumping amplitude a(t) of each step
+    n_replicas : int, optional
+        Number of independent replicas. Default is 1.
+    dt : float, optional
+        Time step. Default is 0.5.
+    rng : np.random.Generator, optional
+        Random number generator for the initial positions
+
+    Returns
+    -------
+    np.array of shape (n, n_replicas)
+        Final spins (+1 or -1)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n = J.shape[0]
+    J = J.astype(np.float32)
+    h = np.asarray(h, dtype=np.float32)[:, np.newaxis]
+    c0 = np.float32(0.5 / _field_scale(J, h.ravel()))
+
+    x = rng.uniform(-0.1, 0.1, size=(n, n_replicas)).astype(np.float32)
+    y = rng.uniform(-0.1, 0.1, size=(n, n_replicas)).astype(np.float32)
+    for a in pumping:
+        y += dt * (-(1 - a) * x + c0 * (J @ x + h))
+        x += dt * y
+        wall = np.abs(x) > 1
+        x[wall] = np.sign(x[wall])
+        y[wall] = 0
+    return np.where(x >= 0, 1.0, -1.0)
+
+
+def solve_qubo(
+    Q: ArrayLike | sp.spmatrix,
+    mode: str = "sbn",
+    n_steps: int = 1000,
+    n_replicas: int = 8,
+    schedule: Schedule | None = None,
+    dt: float = 0.5,
+    rng: np.random.Generator | None = None,
+) -> Tuple[NDArray[np.integer], float, NDArray[np.floating], float]:
+    """
+    Minimize x^T Q x over binary x with batched replicas
+
+    Parameters
+    ----------
+    Q : array-like or sparse matrix of shape (n, n)
+        QUBO matrix
+    mode : str, optional
+        "sbn" for p-bit (SBN rule) annealing on PBitNetwork, or "sb" for
+        ballistic simulated bifurcation. Default is "sbn".
+    n_steps : int, optional
+        Number of sweeps (sbn) or integration steps (sb). Default is 1000.
+    n_replicas : int, optional
+        Number of independent replicas run together. Default is 8.
+    schedule : array-like or callable, optional
+        Per-step inverse temperature beta (sbn) or pumping a(t) (sb), as
+        values or as a function of n_steps. Default is beta rising
+        linearly from 0.1 to 10 over the RMS input current (sbn), or a(t)
+        rising linearly from 0 to 1 (sb).
+    dt : float, optional
+        Time step of simulated bifurcation. Default is 0.5.
+    rng : np.random.Generator, optional
+        Random number generator
+
+    Returns
+    -------
+    best_x : np.array of int of shape (n,)
+        Best solution found over all replicas
+    best_value : float
+        Its objective x^T Q x
+    values : np.array of shape (n_replicas,)
+        Objective of each replica's solution
+    steps_per_sec : float
+        Sweeps or integration steps per second (all replicas together)
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    rng = np.random.default_rng() if rng is None else rng
+    J, h, offset = qubo_to_ising(Q)
+
+    if schedule is None:
+        if mode == "sbn":
+            scale = _field_scale(J, h)
+            schedule = linear_schedule(0.1 / scale, 10 / scale, n_steps)
+        else:
+            schedule = np.linspace(0, 1, n_steps)
+    values = _resolve_schedule(schedule, n_steps)
+
+    start = time.perf_counter()
+    if mode == "sbn":
+        network = PBitNetwork(J, h)
+        m, energy, _, _ = network.anneal(values, n_replicas=n_replicas, rng=rng)
+    else:
+        m = simulated_bifurcation(J, h, values, n_replicas, dt, rng)
+        energy = PBitNetwork(J, h).energy(m)
+    seconds = time.perf_counter() - start
+
+    x = ((m + 1) // 2).astype(int)
+    replica_values = energy + offset
+    best = int(np.argmin(replica_values))
+    return x[:, best], float(replica_values[best]), replica_values, n_steps / seconds
+
+
+def maxcut_qubo(edges: NDArray[np.integer], n: int) -> sp.csr_matrix:
+    """
+    QUBO whose minimum is minus the maximum cut of an unweighted graph
+
+    Parameters
+    ----------
+    edges : np.array of int of shape (n_edges, 2)
+        Graph edges
+    n : int
+        Number of vertices
+
+    Returns
+    -------
+    sp.csr_matrix
+        Q with x^T Q x = -(number of cut edges)
+    """
+    i, j = edges[:, 0], edges[:, 1]
+    ones = np.ones(len(edges))
+    Q = sp.coo_matrix((2 * ones, (i, j)), shape=(n, n))
+    degree = np.bincount(np.concatenate([i, j]), minlength=n)
+    return (Q - sp.diags(degree.astype(float))).tocsr()
+
+
+if __name__ == "__main__":
+    # Max-cut of a random sparse graph
+    n = 10000  # Number of variables
+    n_edges = 3 * n
+    seed = 0
+    rng = np.random.default_rng(seed)
+    edges = rng.integers(0, n, size=(n_edges, 2))
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    Q = maxcut_qubo(edges, n)
+
+    # Solver parameters
+    n_steps = 1000
+    n_replicas = 8
+
+    for mode in MODES:
+        start = time.perf_counter()
+        x, value, values, steps_per_sec = solve_qubo(
+            Q, mode=mode, n_steps=n_steps, n_replicas=n_replicas, rng=rng
+        )
+        print(
+            f"{mode:>4}: cut {-value:.0f} of {len(edges)} edges "
+            f"(replica mean {-values.mean():.1f}), {steps_per_sec:.0f} steps/s, "
+            f"{time.perf_counter() - start:.1f} s"
+        )